@@ -0,0 +1,880 @@
+"""
+翻訳オーバーレイ ベンチマーク
+====================================
+GUIを起動せずに処理ごとの所要時間を計測します。
+
+使い方:
+    py benchmark.py ocr --frames 20
+    py benchmark.py capture --frames 50
+    py benchmark.py preprocess --image screenshot.png --expected screenshot.txt
+    py benchmark.py parallel --workers 1,2,4,8
+    py benchmark.py render --lines 40
+    py benchmark.py wrap --lines 60
+    py benchmark.py jitter --lines 60 --edits 5
+    py benchmark.py suite --resolutions 1280x720,1920x1080 --ocr stub
+"""
+
+import argparse
+import difflib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import mss
+from PIL import Image, ImageDraw
+
+from main import (
+    CaptureService, ChangeDetector, Frame, OcrJitterGate, OfflineDictionaryBackend, ParallelOcr, PerfTracer,
+    Preprocessor, PytesseractEngine, ScreenMemo, ScrollOcr, SegmentTranslator, TesserocrEngine, TextLayout,
+    TextRegionDetector, TextRenderer, TranslationCache, create_ocr_engine, load_display_font, prepare_ocr_images,
+    recognize_ocr_images, row_hashes,
+)
+
+
+SAMPLE_LINES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Settings saved successfully. Restart to apply changes.",
+    "Player 2 has joined the game (ping: 48 ms)",
+    "Error: unable to connect to the server. Retrying in 5 seconds...",
+    "Click OK to continue or Cancel to go back.",
+]
+
+
+def make_text_image(width, height, lines=SAMPLE_LINES, line_height=22):
+    """英語テキストを描画したテスト用の画像を作成"""
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    y = 10
+    index = 0
+    while y + line_height < height:
+        draw.text((10, y), lines[index % len(lines)], fill='black')
+        y += line_height
+        index += 1
+    return image
+
+
+def summarize(samples):
+    """計測結果（秒）からミリ秒単位の統計を作成"""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(len(ordered) * 0.95))
+    return {
+        'mean': statistics.mean(ordered) * 1000,
+        'p50': statistics.median(ordered) * 1000,
+        'p95': ordered[p95_index] * 1000,
+        'max': ordered[-1] * 1000,
+    }
+
+
+def print_summary(label, samples):
+    """統計を1行で表示"""
+    stats = summarize(samples)
+    print(
+        f"{label:<24} mean {stats['mean']:8.1f} ms  p50 {stats['p50']:8.1f} ms"
+        f"  p95 {stats['p95']:8.1f} ms  max {stats['max']:8.1f} ms"
+    )
+
+
+def bench_ocr(args):
+    """OCRエンジンごとの1フレームあたりの所要時間を比較"""
+    image = make_text_image(args.width, args.height)
+    engines = [('pytesseract', PytesseractEngine), ('tesserocr', TesserocrEngine)]
+
+    for name, engine_class in engines:
+        try:
+            engine = engine_class()
+        except (ImportError, RuntimeError) as e:
+            print(f"{name:<24} 使用できません: {e}")
+            continue
+
+        try:
+            # 初回（モデル読み込み込み）とウォームアップ後を分けて計測
+            start = time.perf_counter()
+            engine.recognize(image)
+            first = time.perf_counter() - start
+
+            samples = []
+            for _ in range(args.frames):
+                start = time.perf_counter()
+                engine.recognize(image)
+                samples.append(time.perf_counter() - start)
+        except Exception as e:
+            print(f"{name:<24} 実行できません: {e}")
+            continue
+        finally:
+            engine.close()
+
+        print(f"{name:<24} first {first * 1000:8.1f} ms")
+        print_summary(name, samples)
+
+
+def bench_capture(args):
+    """キャプチャ処理の所要時間とメモリ確保量を比較（旧方式 / CaptureService）"""
+    region = {'left': 0, 'top': 0, 'width': args.width, 'height': args.height}
+
+    def legacy_grab():
+        # 旧方式: 毎回mssを開き、BGRAをRGBのPIL画像にコピーする
+        with mss.mss() as sct:
+            screenshot = sct.grab(region)
+            return Image.frombytes('RGB', screenshot.size, screenshot.bgra, 'raw', 'BGRX')
+
+    service = CaptureService()
+    cases = [('legacy (mss+frombytes)', legacy_grab), ('CaptureService', lambda: service.grab(region))]
+
+    for name, grab in cases:
+        try:
+            grab()
+        except Exception as e:
+            print(f"{name:<24} 実行できません: {e}")
+            continue
+
+        samples = []
+        tracemalloc.start()
+        for _ in range(args.frames):
+            start = time.perf_counter()
+            grab()
+            samples.append(time.perf_counter() - start)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print_summary(name, samples)
+        print(f"{'':<24} peak alloc {peak / 1024 / 1024:8.1f} MB")
+
+    service.close()
+
+
+PREPROCESS_CASES = [
+    ('raw RGB', dict(grayscale=False)),
+    ('gray', dict(auto_invert=False, contrast=None, normalize_scale=False)),
+    ('gray+invert', dict(contrast=None, normalize_scale=False)),
+    ('gray+invert+stretch', dict(contrast='stretch', normalize_scale=False)),
+    ('gray+invert+threshold', dict(contrast='threshold', normalize_scale=False)),
+    ('all (stretch+scale)', dict(contrast='stretch')),
+    ('all (threshold+scale)', dict(contrast='threshold')),
+]
+
+
+def bench_preprocess(args):
+    """前処理の組み合わせごとに前処理時間・OCR時間・認識精度を比較"""
+    if args.image:
+        source = Image.open(args.image)
+    else:
+        source = make_text_image(args.width, args.height)
+    expected = None
+    if args.expected:
+        with open(args.expected, encoding='utf-8') as f:
+            expected = ' '.join(f.read().split())
+
+    try:
+        engine = create_ocr_engine(args.engine)
+        engine.warm_up()
+    except Exception as e:
+        engine = None
+        print(f"OCRエンジンを使用できません（前処理時間のみ計測します）: {e}")
+
+    for name, options in PREPROCESS_CASES:
+        preprocessor = Preprocessor(**options)
+        pre_samples = []
+        ocr_samples = []
+        step_totals = {}
+        text = ""
+        for _ in range(args.frames):
+            # 毎回新しいFrameを作り、グレースケールのキャッシュを効かせない
+            frame = Frame.from_image(source)
+            start = time.perf_counter()
+            image = preprocessor.process(frame)
+            pre_samples.append(time.perf_counter() - start)
+            for step, ms in preprocessor.last_timings.items():
+                step_totals[step] = step_totals.get(step, 0.0) + ms
+
+            if engine is not None:
+                start = time.perf_counter()
+                text = engine.recognize(image)
+                ocr_samples.append(time.perf_counter() - start)
+
+        print_summary(f"{name} pre", pre_samples)
+        steps = '  '.join(f"{step} {total / args.frames:.1f}" for step, total in step_totals.items())
+        print(f"{'':<24} steps(ms): {steps}")
+        if ocr_samples:
+            print_summary(f"{name} ocr", ocr_samples)
+            if expected is not None:
+                accuracy = difflib.SequenceMatcher(None, ' '.join(text.split()), expected).ratio()
+                print(f"{'':<24} accuracy {accuracy:.1%}")
+
+    if engine is not None:
+        engine.close()
+
+
+def bench_parallel(args):
+    """並列OCRのワーカー数ごとの所要時間を比較"""
+    image = Preprocessor().process(Frame.from_image(make_text_image(args.width, args.height)))
+    baseline = None
+    for workers in [int(value) for value in args.workers.split(',')]:
+        parallel = ParallelOcr(workers, engine_name=args.engine)
+        try:
+            # プロセス起動とモデル読み込みは計測から除く
+            parallel.warm_up()
+            samples = []
+            for _ in range(args.frames):
+                start = time.perf_counter()
+                parallel.recognize(image)
+                samples.append(time.perf_counter() - start)
+        except Exception as e:
+            print(f"workers={workers:<16} 実行できません: {e}")
+            continue
+        finally:
+            parallel.close()
+
+        print_summary(f"workers={workers}", samples)
+        median = statistics.median(samples)
+        if baseline is None:
+            baseline = median
+        print(f"{'':<24} speedup x{baseline / median:.2f}")
+
+
+SAMPLE_TRANSLATION = "設定が保存されました。変更を適用するには再起動してください。(Settings v2.1)"
+
+
+def legacy_wrap_text(text, max_width, font_size):
+    """旧方式の文字数ベースの折り返し（比較用）"""
+    chars_per_line = max(10, int(max_width / (font_size * 0.8)))
+    lines = []
+    for paragraph in text.split('\n'):
+        if not paragraph.strip():
+            continue
+        while len(paragraph) > chars_per_line:
+            lines.append(paragraph[:chars_per_line])
+            paragraph = paragraph[chars_per_line:]
+        if paragraph:
+            lines.append(paragraph)
+    return lines
+
+
+def bench_render(args):
+    """翻訳テキストの描画時間を比較（旧方式: 1行9個のcreate_text / TextRenderer）
+
+    既定は全画面（1920x1080・40行）。どちらも root.update() で画面への描画まで含めて計測する。
+    TextRendererは翻訳ワーカーでの画像の作成と、UIスレッドでの貼り付けを分けて表示する。
+    """
+    import tkinter as tk
+    from PIL import ImageTk
+
+    texts = [
+        '\n'.join(f"{SAMPLE_TRANSLATION} [{frame}-{line}]" for line in range(args.lines))
+        for frame in range(args.frames)
+    ]
+    # 翻訳の途中経過のように、前の画面から1行だけ変わるテキスト
+    progressive = [texts[0]]
+    for frame in range(1, args.frames):
+        lines = progressive[-1].split('\n')
+        lines[frame % len(lines)] += " ✓"
+        progressive.append('\n'.join(lines))
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        root = None
+        print(f"Tkを起動できません（画面のある環境で実行してください）: {e}")
+        print("画像の作成（翻訳ワーカー側）のみ計測します")
+        font_pixels = round(14 * 96 / 72)
+    else:
+        root.geometry(f"{args.width}x{args.height}+0+0")
+        canvas = tk.Canvas(root, bg='black', highlightthickness=0, width=args.width, height=args.height)
+        canvas.pack()
+        root.update()
+        font_pixels = round(14 * root.winfo_fpixels('1i') / 72)
+
+    renderer = TextRenderer(font_size=14, pixel_size=font_pixels)
+    for label, sequence in [('all changed', texts), ('1 changed', progressive)]:
+        renderer.reset()
+        images = []
+        samples = []
+        for text in sequence:
+            start = time.perf_counter()
+            images.append(renderer.render(text, args.width, args.height))
+            samples.append(time.perf_counter() - start)
+        print_summary(f"rasterize ({label})", samples)
+    if root is None:
+        return
+
+    def legacy_draw(text):
+        # 旧方式: 全消去して1行ごとに縁取り8個 + 本文1個のテキストを作る
+        canvas.delete("all")
+        y_pos = 10
+        for line in legacy_wrap_text(text, args.width - 20, 14):
+            if y_pos + 22 > args.height:
+                break
+            for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1), (-2, 0), (2, 0), (0, -2), (0, 2)]:
+                canvas.create_text(10 + dx, y_pos + dy, text=line, anchor='nw', fill='#1a1a2e',
+                                   font=('Yu Gothic UI', 14, 'bold'))
+            canvas.create_text(10, y_pos, text=line, anchor='nw', fill='#ffffff',
+                               font=('Yu Gothic UI', 14, 'bold'))
+            y_pos += 22
+        root.update()
+
+    canvas.delete("all")
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        legacy_draw(text)
+        samples.append(time.perf_counter() - start)
+    print_summary('legacy canvas (UI)', samples)
+
+    # UIスレッドの処理は作成済みの画像をPhotoImageに貼り付けて画面に反映するだけ
+    canvas.delete("all")
+    photo = ImageTk.PhotoImage(images[0])
+    canvas.create_image(0, 0, anchor='nw', image=photo)
+    samples = []
+    for image in images:
+        start = time.perf_counter()
+        photo.paste(image)
+        root.update()
+        samples.append(time.perf_counter() - start)
+    print_summary('TextRenderer paste (UI)', samples)
+
+    root.destroy()
+
+
+def bench_wrap(args):
+    """全画面の長い翻訳文の折り返し時間を比較"""
+    font = load_display_font(round(14 * 96 / 72))
+    texts = [
+        '\n'.join(f"{SAMPLE_TRANSLATION * 3} [{frame}-{line}]" for line in range(args.lines))
+        for frame in range(args.frames)
+    ]
+    max_width = args.width - 20
+
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        legacy_wrap_text(text, max_width, 14)
+        samples.append(time.perf_counter() - start)
+    print_summary('legacy (char count)', samples)
+
+    # 毎回新しいTextLayout（文字幅キャッシュなし）
+    samples = []
+    for text in texts:
+        layout = TextLayout(font)
+        start = time.perf_counter()
+        layout.wrap(text, max_width)
+        samples.append(time.perf_counter() - start)
+    print_summary('TextLayout (cold)', samples)
+
+    # 文字幅キャッシュあり・レイアウトは初回
+    layout = TextLayout(font)
+    layout.wrap(texts[0], max_width)
+    samples = []
+    for text in texts[1:]:
+        start = time.perf_counter()
+        layout.wrap(text, max_width)
+        samples.append(time.perf_counter() - start)
+    print_summary('TextLayout (warm widths)', samples)
+
+    # 同じテキスト・幅（レイアウトキャッシュ）
+    samples = []
+    for _ in range(args.frames):
+        start = time.perf_counter()
+        layout.wrap(texts[-1], max_width)
+        samples.append(time.perf_counter() - start)
+    print_summary('TextLayout (cached)', samples)
+
+    # 実際の幅からのはみ出し（旧方式は文字数で折り返すため幅を超えることがある）
+    overflow = sum(1 for line in legacy_wrap_text(texts[0], max_width, 14) if font.getlength(line) > max_width)
+    print(f"{'':<24} legacy lines overflowing width: {overflow}")
+
+
+def add_ocr_jitter(text, edits, rng):
+    """OCRの揺れを模して、ランダムな位置の文字をedits個だけ似た文字に置き換える"""
+    confusable = {'l': 'I', 'I': 'l', 'o': '0', '0': 'o', 'e': 'c', 'c': 'e', '.': ',', ',': '.'}
+    chars = list(text)
+    positions = [index for index, char in enumerate(chars) if not char.isspace()]
+    for index in rng.sample(positions, min(edits, len(positions))):
+        chars[index] = confusable.get(chars[index], '.')
+    return ''.join(chars)
+
+
+def bench_jitter(args):
+    """全画面のOCR結果に対するOCRの揺れの判定時間と判定結果"""
+    rng = random.Random(0)
+    base = '\n'.join(f"{SAMPLE_LINES[line % len(SAMPLE_LINES)]} [{line}]" for line in range(args.lines))
+    cases = [
+        ('same', lambda: base),
+        (f'jitter ({args.edits} chars)', lambda: add_ocr_jitter(base, args.edits, rng)),
+        ('one line changed', lambda: base.replace('[0]', '[0] Player 3 has left the game')),
+        ('scrolled 3 lines', lambda: '\n'.join(base.splitlines()[3:] + SAMPLE_LINES[:3])),
+        ('different screen', lambda: add_ocr_jitter(base, len(base) // 3, rng)),
+    ]
+    limit = OcrJitterGate(args.threshold, args.max_edits, args.min_length).limit(len(base))
+    print(f"{len(base)} chars / threshold {args.threshold:.0%} ({limit} edits)")
+
+    for label, make_text in cases:
+        gate = OcrJitterGate(args.threshold, args.max_edits, args.min_length)
+        gate.accept(base, "訳")
+        texts = [make_text() for _ in range(args.frames)]
+        samples = []
+        reused = 0
+        for text in texts:
+            start = time.perf_counter()
+            if gate.check(text) is not None:
+                reused += 1
+            samples.append(time.perf_counter() - start)
+        print_summary(label, samples)
+        print(f"{'':<24} reused {reused}/{len(texts)}")
+
+    # 比較: difflibで類似度を計算する場合
+    samples = []
+    for _ in range(args.frames):
+        text = add_ocr_jitter(base, args.edits, rng)
+        start = time.perf_counter()
+        difflib.SequenceMatcher(None, base, text).ratio()
+        samples.append(time.perf_counter() - start)
+    print_summary('difflib ratio (chars)', samples)
+
+
+# ===== 総合ベンチマーク（suite） =====
+
+SPEAKERS = ["Alice", "Bob", "Server"]
+SUITE_STAGES = [
+    'change_detect', 'screen_memo', 'preprocess', 'ocr', 'ocr_gate', 'translate', 'layout', 'render', 'first_text',
+    'end_to_end',
+]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_results')
+
+
+class StubBackend(OfflineDictionaryBackend):
+    """決定的な結果を返すベンチマーク用の翻訳バックエンド
+
+    用語集による翻訳に、1リクエストあたり一定の待ち時間を加えて
+    翻訳サービスへの通信を模擬する。結果は翻訳キャッシュに保存する。
+    """
+
+    name = 'stub'
+    cacheable = True
+
+    def __init__(self, latency=0.08):
+        super().__init__()
+        self.latency = latency
+
+    def translate(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return super().translate(text)
+
+
+def make_log_frames(width, height, frames, hold, line_height=22):
+    """チャットログが流れていく合成スクリーンショットの列を作成
+
+    hold フレームごとに1行ずつ新しい行が下に追加される（同じ画面が hold 回続く）。
+    (PIL画像, 画面に描画したテキスト, 行ごとの (上端, 下端, テキスト)) のリストを返す。
+    """
+    visible = max(1, (height - 10) // line_height)
+    log = [
+        f"[{SPEAKERS[index % len(SPEAKERS)]}] {SAMPLE_LINES[index % len(SAMPLE_LINES)]}"
+        for index in range(frames // hold + visible + 1)
+    ]
+    sequence = []
+    for number in range(frames):
+        offset = number // hold
+        lines = log[offset:offset + visible]
+        image = Image.new('RGB', (width, height), 'white')
+        draw = ImageDraw.Draw(image)
+        boxes = []
+        for row, line in enumerate(lines):
+            position = (10, 10 + row * line_height)
+            draw.text(position, line, fill='black')
+            _, top, _, bottom = draw.textbbox(position, line)
+            boxes.append((top, bottom, line))
+        sequence.append((image, '\n'.join(lines), boxes))
+    return sequence
+
+
+def load_fixture_frames(directory):
+    """フォルダ内のPNGを解像度ごとのフレーム列として読み込む
+
+    同名の .txt があれば画面のテキスト（--ocr stub での認識結果）として使う。
+    行の位置は分からないため、--ocr stub ではスクロール追跡は常に全体を認識し直す。
+    """
+    groups = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith('.png'):
+            continue
+        path = os.path.join(directory, name)
+        image = Image.open(path).convert('RGB')
+        text = ""
+        text_path = os.path.splitext(path)[0] + '.txt'
+        if os.path.exists(text_path):
+            with open(text_path, encoding='utf-8') as f:
+                text = f.read().strip()
+        groups.setdefault(f"{image.width}x{image.height}", []).append((image, text, None))
+    return groups
+
+
+class StubScrollOcr(ScrollOcr):
+    """--ocr stub 用のScrollOcr（画面に描画した行のうち、認識する範囲に収まる行を返す）"""
+
+    def __init__(self, preprocessor):
+        super().__init__(None, preprocessor)
+        self.lines = None  # 現在のフレームの行ごとの (上端, 下端, テキスト)。不明ならNone
+        self.text = ""
+
+    def _recognize_lines(self, frame, image=None, offset=0):
+        if image is None:
+            # 前処理の時間は実際のOCRと同じように含める
+            self.preprocessor.process(frame)
+        if self.lines is None:
+            # 行の位置が分からない場合は画面全体を1行として扱う（端に接するため次回は全体を認識し直す）
+            return [(offset, offset + frame.height, self.text)] if self.text else []
+        bottom = offset + frame.height
+        return [line for line in self.lines if line[0] >= offset and line[1] <= bottom]
+
+
+def run_suite_sequence(sequence, recognize, engine, args):
+    """1つのフレーム列をアプリと同じ順序で処理
+
+    変化検出→画面メモ→前処理→OCR（スクロール追跡）→揺れの判定→翻訳→折り返し→描画。
+    画面メモ・揺れの判定で省略したフレームは、OCR・翻訳の計測に含めず件数だけを数える。
+    """
+    tracer = PerfTracer(window=len(sequence))
+    detector = ChangeDetector()
+    screen_memo = ScreenMemo()
+    preprocessor = Preprocessor()
+    region_detector = TextRegionDetector()
+    scroll_ocr = ScrollOcr(engine, preprocessor) if engine is not None else StubScrollOcr(preprocessor)
+    ocr_gate = OcrJitterGate()
+    cache = TranslationCache()
+    translator = SegmentTranslator(StubBackend(args.latency_ms / 1000), cache)
+    renderer = TextRenderer(font_size=14)
+    width, height = sequence[0][0].size
+
+    # PIL画像からの変換はキャプチャに相当するため計測から除く
+    frames = [(Frame.from_image(image), text, lines) for image, text, lines in sequence]
+
+    wall_start = time.perf_counter()
+    for frame, text, lines in frames:
+        start = time.perf_counter()
+        with tracer.span('change_detect'):
+            changed = detector.has_changed(frame)
+        if not changed:
+            tracer.count('skipped_frames')
+            continue
+
+        with tracer.span('screen_memo'):
+            fingerprint = screen_memo.fingerprint(frame)
+            memo = screen_memo.get(fingerprint)
+        if memo is not None:
+            tracer.count('memo_frames')
+            continue
+        tracer.count('processed_frames')
+
+        # テキスト領域検出を使わない大きさでは、アプリと同じくスクロール追跡を使う
+        use_regions = args.regions == 'always' or (
+            args.regions == 'auto' and frame.width * frame.height >= 1_000_000)
+        scroll = None
+        with tracer.span('preprocess'):
+            if use_regions:
+                images, from_regions = prepare_ocr_images(frame, preprocessor, region_detector)
+            else:
+                scroll = row_hashes(frame.gray())
+                images = None
+                if scroll_ocr.shift_for(scroll) is None:
+                    images, from_regions = prepare_ocr_images(frame, preprocessor)
+        with tracer.span('ocr'):
+            if scroll is not None:
+                if isinstance(scroll_ocr, StubScrollOcr):
+                    scroll_ocr.lines = lines
+                    scroll_ocr.text = text
+                original = scroll_ocr.recognize(frame, scroll, images[0] if images else None).strip()
+                if scroll_ocr.last_shift:
+                    tracer.count('scrolled_frames')
+            else:
+                scroll_ocr.reset()
+                original = recognize_ocr_images(images, from_regions, lambda image: recognize(image, text))
+        if not original:
+            tracer.count('empty_frames')
+            continue
+
+        with tracer.span('ocr_gate'):
+            reuse = ocr_gate.check(original)
+        if reuse is not None:
+            tracer.count('ocr_jitter_frames' if ocr_gate.last_distance else 'ocr_same_frames')
+            screen_memo.put(fingerprint, *reuse)
+            continue
+        # 最初の途中経過（キャッシュ済みの行と最初に返った要求の行）が届くまでを first_text とする
+        # （アプリでは途中経過はUIスレッドで描画されるため、ここでは描画しない）
+        first_text = []
+
+        def on_progress(partial, done, total):
+            if done > 0 and not first_text:
+                first_text.append(time.perf_counter() - start)
+
+        with tracer.span('translate'):
+            translated = translator.translate(original, on_progress)
+        with tracer.span('layout'):
+            renderer.layout(translated, width)
+        with tracer.span('render'):
+            renderer.render(translated, width, height)
+        end_to_end = time.perf_counter() - start
+        tracer.record('first_text', first_text[0] if first_text else end_to_end, start)
+        tracer.record('end_to_end', end_to_end, start)
+        screen_memo.put(fingerprint, original, translated)
+        ocr_gate.accept(original, translated)
+    wall = time.perf_counter() - wall_start
+
+    translator.close()
+    cache_stats = cache.stats()
+    cache.close()
+    return {
+        'frames': len(frames),
+        'processed': tracer.counter('processed_frames'),
+        'skipped': tracer.counter('skipped_frames'),
+        'memo_hits': tracer.counter('memo_frames'),
+        'scrolled': tracer.counter('scrolled_frames'),
+        'ocr_reused': tracer.counter('ocr_jitter_frames') + tracer.counter('ocr_same_frames'),
+        'seconds': wall,
+        'fps': len(frames) / wall if wall else 0.0,
+        'cache_hit_rate': cache_stats['hit_rate'],
+        'sent_chars': translator.total_sent_chars,
+        'total_chars': translator.total_chars,
+        'stages': tracer.summary(),
+    }
+
+
+def make_suite_recognizer(name):
+    """(エンジン名, OCR関数, スクロール追跡に使うエンジン) を作成
+
+    stub は画面に描画したテキストをそのまま返す（スクロール追跡はStubScrollOcrを使うためエンジンはNone）。
+    """
+    if name != 'stub':
+        try:
+            engine = create_ocr_engine(name)
+            engine.warm_up()
+            engine.recognize(make_text_image(200, 40))
+            return engine.name, lambda image, text: engine.recognize(image), engine
+        except Exception as e:
+            if name != 'auto':
+                raise
+            print(f"OCRエンジンを使用できないため stub で計測します: {e}")
+
+    # テキスト領域ごとに呼ばれても、テキストは同じフレームで1回だけ返す
+    state = {'text': None}
+
+    def recognize(image, text):
+        if state['text'] == text:
+            return ""
+        state['text'] = text
+        return text
+    return 'stub', recognize, None
+
+
+def current_commit():
+    """計測したコミット（未コミットの変更があれば末尾に +dirty）"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('+dirty' if dirty else '')
+
+
+def latest_result(directory, exclude=None):
+    """保存済みの結果のうち最新のファイル"""
+    if not os.path.isdir(directory):
+        return None
+    names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    paths = [os.path.join(directory, name) for name in names]
+    paths = [path for path in paths if path != exclude]
+    return paths[-1] if paths else None
+
+
+def compare_results(current, baseline, threshold):
+    """前回の結果と比較して表示し、遅くなった段階の数を返す"""
+    print(f"\n比較: {baseline['commit']} ({baseline['timestamp']}) → {current['commit']}")
+    if baseline['config'] != current['config']:
+        print("  ⚠ 計測条件が異なります（参考値として比較します）")
+
+    regressions = 0
+    for label, result in current['runs'].items():
+        before = baseline['runs'].get(label)
+        if before is None:
+            continue
+        print(f"  {label}: fps {before['fps']:.1f} → {result['fps']:.1f}")
+        if 'memo_hits' in before:
+            print(
+                f"    画面メモ {before['memo_hits']} → {result['memo_hits']}"
+                f" / スクロール {before['scrolled']} → {result['scrolled']}"
+                f" / 揺れで翻訳を省略 {before['ocr_reused']} → {result['ocr_reused']}"
+            )
+        for stage in SUITE_STAGES:
+            if stage not in result['stages'] or stage not in before['stages']:
+                continue
+            old = before['stages'][stage]['p50']
+            new = result['stages'][stage]['p50']
+            change = (new - old) / old if old else 0.0
+            # 0.5ms未満の差は計測誤差として扱う
+            slower = change > threshold and new - old > 0.5
+            regressions += slower
+            mark = "⚠ 遅くなりました" if slower else ""
+            print(f"    {stage:<16} p50 {old:8.2f} → {new:8.2f} ms ({change:+.0%}) {mark}")
+    return regressions
+
+
+def bench_suite(args):
+    """合成（または指定フォルダの）スクリーンショットで処理全体を計測し、結果を保存・比較"""
+    if args.fixtures:
+        corpus = load_fixture_frames(args.fixtures)
+        if not corpus:
+            print(f"PNG画像が見つかりません: {args.fixtures}")
+            return
+    else:
+        corpus = {}
+        for resolution in args.resolutions.split(','):
+            width, height = (int(value) for value in resolution.lower().split('x'))
+            corpus[f"{width}x{height}"] = make_log_frames(width, height, args.frames, args.hold)
+
+    ocr_name, recognize, engine = make_suite_recognizer(args.ocr)
+    config = {
+        'ocr': ocr_name,
+        'latency_ms': args.latency_ms,
+        'regions': args.regions,
+        'fixtures': args.fixtures or f"generated frames={args.frames} hold={args.hold}",
+    }
+    print(f"OCR: {ocr_name} / 翻訳: stub ({args.latency_ms} ms/リクエスト)")
+
+    runs = {}
+    for label, sequence in corpus.items():
+        result = run_suite_sequence(sequence, recognize, engine, args)
+        runs[label] = result
+        print(
+            f"\n{label}: {result['frames']}フレーム {result['fps']:.1f} fps"
+            f" (処理 {result['processed']} / スキップ {result['skipped']})"
+            f" キャッシュ {result['cache_hit_rate']:.0%} 送信 {result['sent_chars']}/{result['total_chars']}文字"
+        )
+        print(
+            f"  画面メモ {result['memo_hits']}回 / スクロール {result['scrolled']}回"
+            f" / 揺れで翻訳を省略 {result['ocr_reused']}回"
+        )
+        for stage in SUITE_STAGES:
+            stats = result['stages'].get(stage)
+            if stats:
+                print(
+                    f"  {stage:<22} p50 {stats['p50']:8.2f} ms  p95 {stats['p95']:8.2f} ms"
+                    f"  max {stats['max']:8.2f} ms  n={stats['count']}"
+                )
+
+    current = {
+        'commit': current_commit(),
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'config': config,
+        'runs': runs,
+    }
+
+    path = None
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{current['commit']}.json"
+        path = os.path.join(args.results_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"\n結果を保存しました: {path}")
+
+    baseline_path = args.compare or latest_result(args.results_dir, exclude=path)
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(current, baseline, args.threshold / 100)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="翻訳オーバーレイのベンチマーク")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ocr_parser = subparsers.add_parser('ocr', help="OCRエンジンの比較")
+    ocr_parser.add_argument('--frames', type=int, default=20, help="計測するフレーム数")
+    ocr_parser.add_argument('--width', type=int, default=600, help="画像の幅")
+    ocr_parser.add_argument('--height', type=int, default=200, help="画像の高さ")
+    ocr_parser.set_defaults(func=bench_ocr)
+
+    capture_parser = subparsers.add_parser('capture', help="画面キャプチャの比較")
+    capture_parser.add_argument('--frames', type=int, default=50, help="計測するフレーム数")
+    capture_parser.add_argument('--width', type=int, default=1920, help="キャプチャ領域の幅")
+    capture_parser.add_argument('--height', type=int, default=1080, help="キャプチャ領域の高さ")
+    capture_parser.set_defaults(func=bench_capture)
+
+    preprocess_parser = subparsers.add_parser('preprocess', help="OCR前処理の比較")
+    preprocess_parser.add_argument('--image', help="計測に使うスクリーンショット（省略時は合成画像）")
+    preprocess_parser.add_argument('--expected', help="正解テキストのファイル（認識精度を計算）")
+    preprocess_parser.add_argument('--engine', default='auto', help="OCRエンジン（auto/tesserocr/pytesseract）")
+    preprocess_parser.add_argument('--frames', type=int, default=5, help="計測するフレーム数")
+    preprocess_parser.add_argument('--width', type=int, default=1280, help="合成画像の幅")
+    preprocess_parser.add_argument('--height', type=int, default=720, help="合成画像の高さ")
+    preprocess_parser.set_defaults(func=bench_preprocess)
+
+    parallel_parser = subparsers.add_parser('parallel', help="並列OCRのスケーリング")
+    parallel_parser.add_argument('--workers', default='1,2,4,8', help="ワーカー数（カンマ区切り）")
+    parallel_parser.add_argument('--engine', default='auto', help="OCRエンジン（auto/tesserocr/pytesseract）")
+    parallel_parser.add_argument('--frames', type=int, default=5, help="計測するフレーム数")
+    parallel_parser.add_argument('--width', type=int, default=1920, help="合成画像の幅")
+    parallel_parser.add_argument('--height', type=int, default=1080, help="合成画像の高さ")
+    parallel_parser.set_defaults(func=bench_parallel)
+
+    render_parser = subparsers.add_parser('render', help="翻訳テキストの描画の比較")
+    render_parser.add_argument('--lines', type=int, default=40, help="描画する行数")
+    render_parser.add_argument('--frames', type=int, default=20, help="計測するフレーム数")
+    render_parser.add_argument('--width', type=int, default=1920, help="Canvasの幅（既定は全画面）")
+    render_parser.add_argument('--height', type=int, default=1080, help="Canvasの高さ（既定は全画面）")
+    render_parser.set_defaults(func=bench_render)
+
+    wrap_parser = subparsers.add_parser('wrap', help="テキストの折り返しの比較")
+    wrap_parser.add_argument('--lines', type=int, default=60, help="段落数")
+    wrap_parser.add_argument('--frames', type=int, default=20, help="計測するフレーム数")
+    wrap_parser.add_argument('--width', type=int, default=1920, help="表示幅")
+    wrap_parser.set_defaults(func=bench_wrap)
+
+    jitter_parser = subparsers.add_parser('jitter', help="OCRの揺れの判定")
+    jitter_parser.add_argument('--lines', type=int, default=60, help="OCR結果の行数")
+    jitter_parser.add_argument('--edits', type=int, default=5, help="揺れで変わる文字数")
+    jitter_parser.add_argument('--threshold', type=float, default=0.02, help="許容する編集距離（文字数に対する割合）")
+    jitter_parser.add_argument('--max-edits', type=int, default=6, help="許容する編集距離の上限")
+    jitter_parser.add_argument('--min-length', type=int, default=None,
+                               help="割合によらず1文字の揺れを許容する最小の文字数（省略時は割合どおり）")
+    jitter_parser.add_argument('--frames', type=int, default=50, help="計測するフレーム数")
+    jitter_parser.set_defaults(func=bench_jitter)
+
+    suite_parser = subparsers.add_parser('suite', help="処理全体の計測（結果を保存して前回と比較）")
+    suite_parser.add_argument('--resolutions', default='640x360,1280x720,1920x1080,2560x1440',
+                              help="合成画像の解像度（カンマ区切り）")
+    suite_parser.add_argument('--fixtures', help="スクリーンショット（PNG）のフォルダ（省略時は合成画像）")
+    suite_parser.add_argument('--frames', type=int, default=60, help="解像度ごとのフレーム数")
+    suite_parser.add_argument('--hold', type=int, default=3, help="同じ画面が続くフレーム数")
+    suite_parser.add_argument('--ocr', default='auto', help="OCRエンジン（auto/tesserocr/pytesseract/stub）")
+    suite_parser.add_argument('--latency-ms', type=float, default=80, help="翻訳1リクエストの模擬待ち時間")
+    suite_parser.add_argument(
+        '--regions', default='auto', choices=['auto', 'always', 'off'],
+        help="テキスト領域検出（auto: アプリと同じく100万画素以上の画面だけ検出 / always: 常に検出して領域ごとにOCR"
+             " / off: 検出せずに画面全体をOCR。検出しない画面ではアプリと同じくスクロール追跡を使う）"
+    )
+    suite_parser.add_argument('--results-dir', default=RESULTS_DIR, help="結果の保存先")
+    suite_parser.add_argument('--compare', help="比較する結果ファイル（省略時は保存済みの最新）")
+    suite_parser.add_argument('--threshold', type=float, default=10, help="遅くなったと判定する割合（%%）")
+    suite_parser.add_argument('--no-save', action='store_true', help="結果を保存しない")
+    suite_parser.add_argument('--fail-on-regression', action='store_true', help="遅くなった段階があれば終了コード1")
+    suite_parser.set_defaults(func=bench_suite)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
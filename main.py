@@ -9,39 +9,2977 @@
 3. 「翻訳」ボタンを押すか、自動翻訳をONにして翻訳を実行
 """
 
+import time
+
+STARTUP_TIME = time.perf_counter()  # 起動時間の計測の基準（モジュールの読み込み開始）
+
 import tkinter as tk
-from tkinter import ttk, messagebox
-from PIL import Image, ImageTk, ImageDraw, ImageFont
-import mss
-import mss.tools
-import pytesseract
-from deep_translator import GoogleTranslator
+from tkinter import ttk, messagebox, simpledialog
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import argparse
+import bisect
+import importlib
+import mmap
+import random
+import struct
+import zlib
+import re
+import difflib
+import json
 import threading
-import time
+import sqlite3
 import sys
 import os
 
-# ============================================================
-# Tesseract OCRのパス設定（Windows用）
-# ============================================================
-# Tesseractがインストールされていない場合、以下からダウンロード:
-# https://github.com/UB-Mannheim/tesseract/wiki
-#
-# インストール後、以下のコメントを解除してパスを設定してください:
-# pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-# ============================================================
 
-# Windows環境でのデフォルトパスを自動設定
-if sys.platform == 'win32':
-    default_tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-    if os.path.exists(default_tesseract_path):
-        pytesseract.pytesseract.tesseract_cmd = default_tesseract_path
+class LazyModule:
+    """初めて属性を参照した時にモジュールを読み込む代理オブジェクト
+
+    画像処理・OCR・翻訳のライブラリは読み込みに時間がかかるため、
+    ウィンドウを表示した後（ウォームアップか最初の翻訳の時）まで読み込みを遅らせる。
+    """
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load  # 読み込み直後に1回だけ呼ぶ設定処理
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                module = importlib.import_module(self._name)
+                if self._on_load is not None:
+                    self._on_load(module)
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        value = getattr(self._module or self._load(), attr)
+        # 2回目からは通常の属性として参照される
+        self.__dict__[attr] = value
+        return value
+
+# ============================================================
+# Tesseract OCRのパス設定（Windows用）
+# ============================================================
+# Tesseractがインストールされていない場合、以下からダウンロード:
+# https://github.com/UB-Mannheim/tesseract/wiki
+#
+# インストール後、以下のコメントを解除してパスを設定してください:
+# pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+# ============================================================
+
+def _configure_tesseract(module):
+    """Windows環境でのデフォルトパスを自動設定（pytesseractの読み込み時）"""
+    if sys.platform == 'win32':
+        default_tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+        if os.path.exists(default_tesseract_path):
+            module.pytesseract.tesseract_cmd = default_tesseract_path
+
+
+# 読み込みに時間がかかるライブラリ（初めて使う時に読み込む）
+np = LazyModule('numpy')
+Image = LazyModule('PIL.Image')
+ImageTk = LazyModule('PIL.ImageTk')
+ImageDraw = LazyModule('PIL.ImageDraw')
+ImageFont = LazyModule('PIL.ImageFont')
+mss = LazyModule('mss')
+pytesseract = LazyModule('pytesseract', on_load=_configure_tesseract)
+requests = LazyModule('requests')
+bs4 = LazyModule('bs4')
+translator_constants = LazyModule('deep_translator.constants')
+translator_errors = LazyModule('deep_translator.exceptions')
+
+
+# OCR設定（英語テキスト用）
+OCR_LANGUAGE = 'eng'
+OCR_CONFIG = r'--oem 3 --psm 6'
+
+
+class OcrEngine:
+    """OCRエンジンの基底クラス"""
+
+    name = 'base'
+
+    def recognize(self, image):
+        """画像からテキストを抽出"""
+        raise NotImplementedError
+
+    def recognize_lines(self, image):
+        """画像から行ごとに (上端, 下端, テキスト) のリストを上から順に返す"""
+        raise NotImplementedError
+
+    def warm_up(self):
+        """モデルの読み込みなど初回のみの処理を事前に済ませる"""
+        image = Image.new('RGB', (200, 40), 'white')
+        ImageDraw.Draw(image).text((10, 10), "warm up", fill='black')
+        self.recognize(image)
+
+    def close(self):
+        """エンジンを解放"""
+
+
+class PytesseractEngine(OcrEngine):
+    """pytesseract経由でtesseractコマンドを毎回起動するエンジン（フォールバック用）"""
+
+    name = 'pytesseract'
+
+    def recognize(self, image):
+        return pytesseract.image_to_string(image, config=f'{OCR_CONFIG} -l {OCR_LANGUAGE}')
+
+    def recognize_lines(self, image):
+        data = pytesseract.image_to_data(
+            image, config=f'{OCR_CONFIG} -l {OCR_LANGUAGE}', output_type=pytesseract.Output.DICT
+        )
+        lines = {}
+        for index, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            key = (data['block_num'][index], data['par_num'][index], data['line_num'][index])
+            top = data['top'][index]
+            bottom = top + data['height'][index]
+            if key in lines:
+                line_top, line_bottom, words = lines[key]
+                lines[key] = (min(line_top, top), max(line_bottom, bottom), words + [word])
+            else:
+                lines[key] = (top, bottom, [word])
+        return sorted((top, bottom, ' '.join(words)) for top, bottom, words in lines.values())
+
+
+class TesserocrEngine(OcrEngine):
+    """tesserocr経由でTesseractのC APIを常駐させるエンジン
+
+    言語モデルの読み込みは初回のみで、フレームごとのプロセス起動や
+    一時ファイルの書き出しが発生しない。
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, tessdata_path=None):
+        import tesserocr  # 任意の依存ライブラリ（未インストールならImportError）
+
+        if tessdata_path is None:
+            tessdata_path = _default_tessdata_path()
+        kwargs = {'lang': OCR_LANGUAGE, 'psm': tesserocr.PSM.SINGLE_BLOCK, 'oem': tesserocr.OEM.DEFAULT}
+        if tessdata_path:
+            kwargs['path'] = tessdata_path
+        self._tesserocr = tesserocr
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+        # C APIのインスタンスはスレッドセーフではないため排他制御する
+        self._lock = threading.Lock()
+
+    def recognize(self, image):
+        with self._lock:
+            self._api.SetImage(image)
+            return self._api.GetUTF8Text()
+
+    def recognize_lines(self, image):
+        level = self._tesserocr.RIL.TEXTLINE
+        lines = []
+        with self._lock:
+            self._api.SetImage(image)
+            self._api.Recognize()
+            for line in self._tesserocr.iterate_level(self._api.GetIterator(), level):
+                text = line.GetUTF8Text(level)
+                box = line.BoundingBox(level)
+                if text and text.strip() and box:
+                    lines.append((box[1], box[3], text.strip()))
+        return sorted(lines)
+
+    def close(self):
+        with self._lock:
+            if self._api is not None:
+                self._api.End()
+                self._api = None
+
+
+def _default_tessdata_path():
+    """tessdataフォルダの場所を推定（見つからなければNone）"""
+    tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+    if os.path.isabs(tesseract_cmd):
+        tessdata = os.path.join(os.path.dirname(tesseract_cmd), 'tessdata')
+        if os.path.isdir(tessdata):
+            # tesserocrはパス末尾の区切り文字を必要とする
+            return tessdata + os.sep
+    return None
+
+
+def create_ocr_engine(preferred='auto'):
+    """OCRエンジンを作成（'auto'なら常駐型を優先し、使えなければpytesseract）"""
+    if preferred in ('auto', 'tesserocr'):
+        try:
+            return TesserocrEngine()
+        except (ImportError, RuntimeError) as e:
+            if preferred == 'tesserocr':
+                raise
+            print(f"常駐OCRエンジンを使用できません（pytesseractを使用します）: {e}")
+    return PytesseractEngine()
+
+
+class LazyOcrEngine(OcrEngine):
+    """初めて使う時にOCRエンジンを作成する（起動時の言語モデルの読み込みを避ける）"""
+
+    def __init__(self, preferred='auto'):
+        self.preferred = preferred
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        """実際のOCRエンジン（初回のみ作成）"""
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = create_ocr_engine(self.preferred)
+        return self._engine
+
+    @property
+    def name(self):
+        return self.engine.name
+
+    def recognize(self, image):
+        return self.engine.recognize(image)
+
+    def recognize_lines(self, image):
+        return self.engine.recognize_lines(image)
+
+    def warm_up(self):
+        self.engine.warm_up()
+
+    def close(self):
+        with self._lock:
+            if self._engine is not None:
+                self._engine.close()
+                self._engine = None
+
+
+class Frame:
+    """キャプチャした1フレーム
+
+    mssが確保したBGRAバッファをコピーせずNumPy配列として参照する。
+    PIL画像やグレースケール配列は必要になった時に一度だけ作成する。
+    """
+
+    def __init__(self, bgra, left=0, top=0, timestamp=None):
+        self.bgra = bgra  # shape: (高さ, 幅, 4) / dtype: uint8
+        self.left = left
+        self.top = top
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self._gray = None
+
+    @classmethod
+    def from_image(cls, image, left=0, top=0):
+        """PIL画像からフレームを作成（ファイルから読み込んだ画像用）"""
+        rgba = np.asarray(image.convert('RGBA'))
+        return cls(np.ascontiguousarray(rgba[:, :, [2, 1, 0, 3]]), left, top)
+
+    @property
+    def width(self):
+        return self.bgra.shape[1]
+
+    @property
+    def height(self):
+        return self.bgra.shape[0]
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    def gray(self):
+        """グレースケール配列（ITU-R BT.601の整数近似）"""
+        if self._gray is None:
+            b = self.bgra[:, :, 0].astype(np.uint16)
+            g = self.bgra[:, :, 1].astype(np.uint16)
+            r = self.bgra[:, :, 2].astype(np.uint16)
+            self._gray = ((r * 77 + g * 150 + b * 29) >> 8).astype(np.uint8)
+        return self._gray
+
+    def to_image(self):
+        """RGBのPIL画像に変換"""
+        return Image.frombuffer('RGB', self.size, np.ascontiguousarray(self.bgra), 'raw', 'BGRX', 0, 1)
+
+    def crop(self, left, top, right, bottom):
+        """指定範囲を切り出したFrame（配列のビューなのでコピーしない）"""
+        cropped = Frame(self.bgra[top:bottom, left:right], self.left + left, self.top + top, self.timestamp)
+        if self._gray is not None:
+            cropped._gray = self._gray[top:bottom, left:right]
+        return cropped
+
+    def crop_region(self, region):
+        """画面座標の領域（mssの形式）と重なる部分を切り出したFrame（重ならなければNone）"""
+        left = max(region['left'] - self.left, 0)
+        top = max(region['top'] - self.top, 0)
+        right = min(region['left'] + region['width'] - self.left, self.width)
+        bottom = min(region['top'] + region['height'] - self.top, self.height)
+        if right <= left or bottom <= top:
+            return None
+        return self.crop(left, top, right, bottom)
+
+
+def box_downsample(channel, width, height):
+    """2次元配列をブロック平均で縮小（アンチエイリアス等の細かいノイズが平均化される）"""
+    src_height, src_width = channel.shape
+    width = min(width, src_width)
+    height = min(height, src_height)
+    rows = np.linspace(0, src_height, height + 1).astype(np.intp)
+    cols = np.linspace(0, src_width, width + 1).astype(np.intp)
+    sums = np.add.reduceat(channel, rows[:-1], axis=0, dtype=np.uint32)
+    sums = np.add.reduceat(sums, cols[:-1], axis=1, dtype=np.uint32)
+    counts = np.outer(np.diff(rows), np.diff(cols))
+    return (sums // counts).astype(np.int16)
+
+
+class Preprocessor:
+    """OCR前の画像処理（NumPyの配列演算で実装、各ステップは個別にON/OFF可能）
+
+    grayscale      : グレースケール化（OFFにすると以降のステップも行わずRGBのまま渡す）
+    auto_invert    : 背景が暗い場合に明暗を反転（ダークテーマの白文字対策）
+    contrast       : 'stretch'（コントラスト伸張） / 'threshold'（大津の二値化） / None
+    normalize_scale: 文字の高さがtarget_text_heightになるよう拡大縮小
+    """
+
+    def __init__(self, grayscale=True, auto_invert=True, contrast='stretch',
+                 normalize_scale=True, target_text_height=32, max_pixels=40_000_000):
+        self.grayscale = grayscale
+        self.auto_invert = auto_invert
+        self.contrast = contrast
+        self.normalize_scale = normalize_scale
+        self.target_text_height = target_text_height
+        self.max_pixels = max_pixels  # 拡大後の画素数の上限
+        self.last_timings = {}  # 直近の各ステップの所要時間（ミリ秒）
+        self.last_scale = 1.0
+
+    def process(self, frame):
+        """Frameを前処理してOCRに渡すPIL画像を返す"""
+        timings = {}
+        self.last_timings = timings
+        self.last_scale = 1.0
+
+        if not self.grayscale:
+            start = time.perf_counter()
+            image = frame.to_image()
+            timings['convert'] = (time.perf_counter() - start) * 1000
+            return image
+
+        start = time.perf_counter()
+        gray = frame.gray()
+        timings['grayscale'] = (time.perf_counter() - start) * 1000
+
+        histogram = None
+        if self.auto_invert:
+            start = time.perf_counter()
+            histogram = np.bincount(gray.ravel(), minlength=256)
+            if self._median(histogram) < 128:
+                gray = 255 - gray
+                histogram = histogram[::-1]
+            timings['invert'] = (time.perf_counter() - start) * 1000
+
+        if self.contrast:
+            start = time.perf_counter()
+            if histogram is None:
+                histogram = np.bincount(gray.ravel(), minlength=256)
+            if self.contrast == 'threshold':
+                lut = self._threshold_lut(histogram)
+            else:
+                lut = self._stretch_lut(histogram)
+            gray = lut[gray]
+            timings['contrast'] = (time.perf_counter() - start) * 1000
+
+        image = Image.fromarray(gray)
+
+        if self.normalize_scale:
+            start = time.perf_counter()
+            scale = self._scale_factor(gray)
+            if scale != 1.0:
+                size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+                image = image.resize(size, Image.BILINEAR if scale > 1 else Image.BOX)
+            self.last_scale = scale
+            timings['scale'] = (time.perf_counter() - start) * 1000
+
+        return image
+
+    @staticmethod
+    def _median(histogram):
+        """ヒストグラムから輝度の中央値を求める"""
+        cumulative = np.cumsum(histogram)
+        return int(np.searchsorted(cumulative, cumulative[-1] / 2))
+
+    @staticmethod
+    def _stretch_lut(histogram, clip=0.01):
+        """上下1%を切り捨てて0-255に引き伸ばす変換表"""
+        cumulative = np.cumsum(histogram)
+        total = cumulative[-1]
+        low = int(np.searchsorted(cumulative, total * clip))
+        high = int(np.searchsorted(cumulative, total * (1 - clip)))
+        if high <= low:
+            return np.arange(256, dtype=np.uint8)
+        values = (np.arange(256, dtype=np.float32) - low) * (255.0 / (high - low))
+        return np.clip(values, 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def _threshold_lut(histogram):
+        """大津の方法で求めたしきい値で二値化する変換表"""
+        levels = np.arange(256, dtype=np.float64)
+        weight_low = np.cumsum(histogram).astype(np.float64)
+        weight_high = weight_low[-1] - weight_low
+        sum_low = np.cumsum(histogram * levels)
+        mean_low = sum_low / np.maximum(weight_low, 1)
+        mean_high = (sum_low[-1] - sum_low) / np.maximum(weight_high, 1)
+        variance = weight_low * weight_high * (mean_low - mean_high) ** 2
+        threshold = int(np.argmax(variance))
+        return np.where(levels > threshold, 255, 0).astype(np.uint8)
+
+    def _scale_factor(self, gray):
+        """行ごとの文字の有無から文字の高さを推定し、拡大率を決める"""
+        # 暗い画素（文字）を含む行が連続する区間を1行分のテキストとみなす
+        ink_rows = (gray < 128).sum(axis=1) > max(1, gray.shape[1] // 500)
+        edges = np.diff(np.concatenate(([0], ink_rows.view(np.int8), [0])))
+        run_lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        run_lengths = run_lengths[run_lengths >= 4]
+        if run_lengths.size == 0:
+            return 1.0
+
+        scale = self.target_text_height / float(np.median(run_lengths))
+        scale = min(max(scale, 0.5), 4.0)
+        max_scale = (self.max_pixels / gray.size) ** 0.5
+        scale = min(scale, max_scale)
+        # 誤差程度の拡大縮小は画質が落ちるだけなので行わない
+        if 0.8 <= scale <= 1.25:
+            return 1.0
+        return scale
+
+
+class TextRegionDetector:
+    """縮小画像のエッジ密度からテキストがありそうな領域を検出"""
+
+    def __init__(self, downscale=4, edge_threshold=40, merge_width=6, merge_height=2,
+                 min_width=4, min_height=2, min_edge_columns=3, margin=6):
+        self.downscale = downscale  # 検出に使う縮小率
+        self.edge_threshold = edge_threshold  # 文字の輪郭とみなす隣接画素の輝度差
+        self.merge_width = merge_width  # 横方向にこの距離（縮小後の画素）以内の文字をつなげる
+        self.merge_height = merge_height  # 縦方向にこの距離以内の行をつなげる
+        self.min_width = min_width  # これより小さい領域はノイズとして捨てる（縮小後の画素）
+        self.min_height = min_height
+        # 輪郭を含む列がこれより少ない領域は図形の縁などとして捨てる
+        self.min_edge_columns = min_edge_columns
+        self.margin = margin  # 切り出す時に周囲に加える余白（元画像の画素）
+
+    def detect(self, gray):
+        """テキスト領域を読む順（上→下、左→右）の (left, top, right, bottom) のリストで返す"""
+        height, width = gray.shape
+        small = box_downsample(gray, max(1, width // self.downscale), max(1, height // self.downscale))
+        scale_y = height / small.shape[0]
+        scale_x = width / small.shape[1]
+
+        # 横方向の輝度差が大きい画素（文字の縦線）を抽出し、近いもの同士をつなげる
+        edges = np.zeros(small.shape, dtype=bool)
+        edges[:, 1:] = np.abs(np.diff(small, axis=1)) > self.edge_threshold
+        mask = self._dilate(edges, self.merge_height, self.merge_width)
+
+        boxes = []
+        for top, bottom in self._runs(mask.any(axis=1)):
+            band = mask[top:bottom]
+            for left, right in self._runs(band.any(axis=0)):
+                # 列で区切った後に上下の範囲を詰め直す
+                rows = np.flatnonzero(band[:, left:right].any(axis=1))
+                box_top = top + rows[0]
+                box_bottom = top + rows[-1] + 1
+                if right - left < self.min_width or box_bottom - box_top < self.min_height:
+                    continue
+                edge_columns = edges[box_top:box_bottom, left:right].any(axis=0).sum()
+                if edge_columns < self.min_edge_columns:
+                    continue
+                boxes.append((
+                    max(0, int(left * scale_x) - self.margin),
+                    max(0, int(box_top * scale_y) - self.margin),
+                    min(width, int(right * scale_x) + self.margin),
+                    min(height, int(box_bottom * scale_y) + self.margin),
+                ))
+        return boxes
+
+    @staticmethod
+    def _dilate(mask, radius_y, radius_x):
+        """積分画像を使った矩形の膨張処理"""
+        padded = np.pad(mask, ((radius_y + 1, radius_y), (radius_x + 1, radius_x)))
+        integral = padded.astype(np.int32).cumsum(axis=0).cumsum(axis=1)
+        size_y = 2 * radius_y + 1
+        size_x = 2 * radius_x + 1
+        window = (
+            integral[size_y:, size_x:] - integral[:-size_y, size_x:]
+            - integral[size_y:, :-size_x] + integral[:-size_y, :-size_x]
+        )
+        return window > 0
+
+    @staticmethod
+    def _runs(flags):
+        """真偽値の列で True が連続する区間を (開始, 終了) のリストで返す"""
+        edges = np.diff(np.concatenate(([0], flags.view(np.int8), [0])))
+        return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+# OCRワーカープロセス内で使うエンジン（プロセスごとに1つ）
+_worker_engine = None
+
+
+class OcrUnavailableError(Exception):
+    """OCRエンジン（tesseract）が見つからない"""
+
+
+def _init_ocr_worker(engine_name, tesseract_cmd):
+    """OCRワーカープロセスの初期化（言語モデルはここで一度だけ読み込む）"""
+    global _worker_engine
+    # 各プロセスが1コアずつ使うよう、Tesseract内部のマルチスレッドを止める
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    _worker_engine = create_ocr_engine(engine_name)
+
+
+def _ocr_in_worker(image):
+    """OCRワーカープロセスで1枚の画像を認識"""
+    try:
+        return _worker_engine.recognize(image)
+    except pytesseract.TesseractNotFoundError:
+        # この例外はpickleできずプロセスプールごと壊れるため、置き換えて返す
+        raise OcrUnavailableError("tesseract is not installed or it's not in your PATH")
+
+
+class ParallelOcr:
+    """複数プロセスでOCRを並列実行
+
+    大きな画像は横長の帯に分割して各プロセスで認識し、読む順に結合する。
+    帯の境界はなるべく行間の空白で区切り、空白が見つからない場合は
+    重なりを持たせて分割し、境界で重複した行を取り除く。
+    """
+
+    def __init__(self, workers, engine_name='auto', min_band_height=200, overlap=40, search_range=80):
+        self.workers = workers
+        self.engine_name = engine_name
+        self.min_band_height = min_band_height  # これより低い帯には分割しない
+        self.overlap = overlap  # 空白で区切れない境界の重なり（画素）
+        self.search_range = search_range  # 境界付近で空白行を探す範囲（画素）
+        self._executor = None
+
+    def _get_executor(self):
+        """プロセスプールを作成（初回のみ）"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_ocr_worker,
+                initargs=(self.engine_name, pytesseract.pytesseract.tesseract_cmd)
+            )
+        return self._executor
+
+    def warm_up(self):
+        """全ワーカープロセスを起動してエンジンを初期化"""
+        image = Image.new('L', (200, 40), 255)
+        ImageDraw.Draw(image).text((10, 10), "warm up", fill=0)
+        self.recognize_many([image] * self.workers)
+
+    def recognize_many(self, images):
+        """複数の画像を並列に認識し、同じ順序で結果を返す"""
+        try:
+            return list(self._get_executor().map(_ocr_in_worker, images))
+        except BrokenProcessPool:
+            # ワーカーが異常終了するとプールは使えなくなるため、作り直して1回だけやり直す
+            self._discard_executor()
+        try:
+            return list(self._get_executor().map(_ocr_in_worker, images))
+        except BrokenProcessPool:
+            self._discard_executor()
+            raise
+
+    def _discard_executor(self):
+        """壊れたプロセスプールを破棄（次回の認識で作り直す）"""
+        executor = self._executor
+        self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def recognize(self, image):
+        """1枚の画像を帯に分割して並列に認識し、結合したテキストを返す"""
+        bands = self._split_bands(image)
+        if len(bands) == 1:
+            return self.recognize_many([image])[0]
+
+        texts = self.recognize_many([image.crop((0, top, image.width, bottom)) for top, bottom, _ in bands])
+        lines = [line for line in texts[0].splitlines() if line.strip()]
+        for text, (_, _, overlapped) in zip(texts[1:], bands[1:]):
+            new_lines = [line for line in text.splitlines() if line.strip()]
+            if overlapped:
+                new_lines = new_lines[self._duplicated_lines(lines, new_lines):]
+            lines.extend(new_lines)
+        return '\n'.join(lines)
+
+    def _split_bands(self, image):
+        """画像を (上端, 下端, 前の帯と重なっているか) のリストに分割"""
+        height = image.height
+        count = min(self.workers, height // self.min_band_height)
+        if count <= 1:
+            return [(0, height, False)]
+
+        gray = np.asarray(image if image.mode == 'L' else image.convert('L'))
+        # 前処理後は文字が暗いので、暗い画素を含まない行を空白行とみなす
+        blank_rows = gray.min(axis=1) > 160
+
+        bands = []
+        top = 0
+        overlapped = False
+        for index in range(1, count):
+            target = height * index // count
+            low = max(top + 1, target - self.search_range)
+            candidates = np.flatnonzero(blank_rows[low:target + self.search_range]) + low
+            if candidates.size:
+                cut = int(candidates[np.argmin(np.abs(candidates - target))])
+                bands.append((top, cut, overlapped))
+                top = cut
+                overlapped = False
+            else:
+                bands.append((top, min(height, target + self.overlap // 2), overlapped))
+                top = max(0, target - self.overlap // 2)
+                overlapped = True
+        bands.append((top, height, overlapped))
+        return bands
+
+    @staticmethod
+    def _duplicated_lines(previous, new, max_lines=3):
+        """前の帯の末尾と重複している新しい帯の先頭行数を返す"""
+        def normalize(line):
+            return ' '.join(line.split()).lower()
+
+        for count in range(min(max_lines, len(previous), len(new)), 0, -1):
+            tail = [normalize(line) for line in previous[-count:]]
+            head = [normalize(line) for line in new[:count]]
+            # 境界で切れた行は文字化けしていることがあるため、あいまいに比較する
+            if all(difflib.SequenceMatcher(None, a, b).ratio() >= 0.8 for a, b in zip(tail, head)):
+                return count
+        return 0
+
+    def close(self):
+        """プロセスプールを停止"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def prepare_ocr_images(frame, preprocessor, region_detector=None):
+    """OCRに渡す画像を作成し、(画像のリスト, テキスト領域ごとに切り出したか) を返す"""
+    if region_detector is None:
+        return [preprocessor.process(frame)], False
+    images = [
+        preprocessor.process(frame.crop(left, top, right, bottom))
+        for left, top, right, bottom in region_detector.detect(frame.gray())
+    ]
+    return images, True
+
+
+def recognize_ocr_images(images, from_regions, recognize, parallel=None):
+    """prepare_ocr_imagesで作成した画像をOCRしてテキストを返す"""
+    if from_regions:
+        if parallel is not None and len(images) > 1:
+            texts = parallel.recognize_many(images)
+        else:
+            texts = [recognize(image) for image in images]
+        return '\n'.join(text.strip() for text in texts if text.strip())
+
+    if parallel is not None:
+        return parallel.recognize(images[0])
+    return recognize(images[0])
+
+
+def ocr_frame(frame, recognize, preprocessor, region_detector=None, parallel=None):
+    """Frameを前処理してOCRする
+
+    region_detectorがあればテキスト領域ごとにOCRして読む順に結合する。
+    parallelがあれば、複数の領域または1枚の大きな画像をプロセスプールで並列に認識する。
+    """
+    images, from_regions = prepare_ocr_images(frame, preprocessor, region_detector)
+    return recognize_ocr_images(images, from_regions, recognize, parallel)
+
+
+def row_hashes(gray):
+    """グレースケール配列の各行のハッシュ値（行単位で画面を比較するため）"""
+    return np.fromiter((hash(row.tobytes()) for row in gray), dtype=np.int64, count=gray.shape[0])
+
+
+class ScrollDetector:
+    """連続するフレームの縦方向のずれ（スクロール量）を行ハッシュの一致から推定"""
+
+    def __init__(self, min_match=0.9, min_rows=8, max_shift_ratio=0.8):
+        self.min_match = min_match  # 重なる範囲で一致しなければならない行の割合
+        self.min_rows = min_rows  # ずれの根拠として必要な特徴的な行の数
+        self.max_shift_ratio = max_shift_ratio  # これ以上のずれはスクロールとみなさない（高さに対する割合）
+
+    def estimate(self, previous, current):
+        """previousの行 y + dy が currentの行 y と一致する dy を返す（上にスクロールすると正、推定できなければNone）"""
+        height = len(current)
+        if previous is None or len(previous) != height:
+            return None
+
+        # 背景だけの行などは何度も現れるので、前のフレームで1回だけ現れる行のみで投票する
+        values, first_index, counts = np.unique(previous, return_index=True, return_counts=True)
+        unique = counts == 1
+        values = values[unique]
+        first_index = first_index[unique]
+        positions = np.searchsorted(values, current)
+        positions[positions >= len(values)] = 0
+        found = values[positions] == current if len(values) else np.zeros(height, dtype=bool)
+        if np.count_nonzero(found) < self.min_rows:
+            return None
+        shifts = first_index[positions[found]] - np.flatnonzero(found)
+        candidates, votes = np.unique(shifts, return_counts=True)
+        best = int(np.argmax(votes))
+        shift = int(candidates[best])
+        if shift == 0 or votes[best] < self.min_rows or abs(shift) > height * self.max_shift_ratio:
+            return None
+
+        # 重なる範囲のほぼすべての行が一致すること（部分的な書き換えと区別する）
+        if shift > 0:
+            overlap_previous, overlap_current = previous[shift:], current[:height - shift]
+        else:
+            overlap_previous, overlap_current = previous[:height + shift], current[-shift:]
+        if np.count_nonzero(overlap_previous == overlap_current) < len(overlap_current) * self.min_match:
+            return None
+        return shift
+
+
+class ScrollOcr:
+    """スクロールしただけの画面は新しく現れた部分だけをOCRする
+
+    前回OCRしたフレームの行ハッシュと、行ごとの位置・テキストを保持する。
+    次のフレームが縦にずれただけなら前回の行をずらして再利用し、
+    画面の端に新しく現れた帯（と端で切れていた行）だけを認識する。
+    """
+
+    def __init__(self, engine, preprocessor, detector=None, max_strip_ratio=0.5, edge_margin=2):
+        self.engine = engine
+        self.preprocessor = preprocessor
+        self.detector = detector or ScrollDetector()
+        self.max_strip_ratio = max_strip_ratio  # 新しく認識する帯がこれより高ければ全体を認識し直す
+        self.edge_margin = edge_margin  # 端からこの画素以内にかかる行は切れているとみなす
+        self._state = None  # (行ハッシュ, [(上端, 下端, テキスト)]) ※別スレッドから参照するため1つにまとめる
+        self.last_shift = 0
+
+        # 統計
+        self.scrolled_frames = 0
+        self.full_frames = 0
+        self.reused_lines = 0
+
+    def shift_for(self, hashes):
+        """前回のフレームからのスクロール量（全体を認識し直す必要があればNone）"""
+        state = self._state
+        if state is None:
+            return None
+        shift = self.detector.estimate(state[0], hashes)
+        if shift is None or self._plan(state[1], shift, len(hashes)) is None:
+            return None
+        return shift
+
+    def _plan(self, lines, shift, height):
+        """ずらして残る行と、新しく認識する範囲 (上端, 下端) を返す"""
+        margin = self.edge_margin
+        kept = [
+            (top - shift, bottom - shift, text) for top, bottom, text in lines
+            if top >= margin and bottom <= height - margin
+            and top - shift >= margin and bottom - shift <= height - margin
+        ]
+        if shift > 0:
+            strip = (max(bottom for _, bottom, _ in kept) + 1 if kept else 0, height)
+        else:
+            strip = (0, min(top for top, _, _ in kept) if kept else height)
+        if strip[1] - strip[0] > height * self.max_strip_ratio:
+            return None
+        return kept, strip
+
+    def _recognize_lines(self, frame, image=None, offset=0):
+        """Frame（と前処理済みの画像）から行を認識し、位置をフレームの座標に直す"""
+        if image is None:
+            image = self.preprocessor.process(frame)
+        scale = frame.height / image.height
+        return [
+            (offset + int(top * scale), offset + int(round(bottom * scale)), text)
+            for top, bottom, text in self.engine.recognize_lines(image)
+        ]
+
+    def recognize(self, frame, hashes, image=None):
+        """フレームのテキストを返す（imageはフレーム全体を前処理した画像。なければ必要な時に作成）"""
+        state = self._state
+        shift = self.detector.estimate(state[0], hashes) if state is not None else None
+        plan = self._plan(state[1], shift, frame.height) if shift is not None else None
+
+        if plan is not None:
+            kept, (top, bottom) = plan
+            new_lines = []
+            if bottom - top >= 4:
+                new_lines = self._recognize_lines(frame.crop(0, top, frame.width, bottom), offset=top)
+            lines = sorted(kept + new_lines)
+            self.last_shift = shift
+            self.scrolled_frames += 1
+            self.reused_lines += len(kept)
+        else:
+            lines = self._recognize_lines(frame, image)
+            self.last_shift = 0
+            self.full_frames += 1
+
+        self._state = (hashes, lines)
+        return '\n'.join(text for _, _, text in lines)
+
+    def reset(self):
+        """保持している前回の結果を破棄"""
+        self._state = None
+
+
+class ChangeDetector:
+    """前回処理したフレームと比較して画面に変化があったかを判定"""
+
+    def __init__(self, threshold=12, sample_size=(96, 48)):
+        # 縮小画像の画素差（0-255）の最大値がこの値以下なら「変化なし」とみなす
+        self.threshold = threshold
+        self.sample_size = sample_size
+        self._reference = None
+        self._frame_size = None
+
+    def _thumbnail(self, frame):
+        """比較用の縮小画像を作成（緑チャンネルをビューのまま縮小し、全画素のコピーを避ける）"""
+        return box_downsample(frame.bgra[:, :, 1], *self.sample_size)
+
+    def has_changed(self, frame):
+        """前回の基準フレームから変化していればTrue（基準フレームも更新）"""
+        thumbnail = self._thumbnail(frame)
+        reference = self._reference
+        if reference is None or frame.size != self._frame_size:
+            changed = True
+        else:
+            changed = int(np.abs(thumbnail - reference).max()) > self.threshold
+
+        if changed:
+            # 基準は最後に処理したフレーム（少しずつの変化も蓄積して検出できる）
+            self._reference = thumbnail
+            self._frame_size = frame.size
+        return changed
+
+    def reset(self):
+        """基準フレームを破棄（次回は必ず「変化あり」になる）"""
+        self._reference = None
+
+
+def union_region(regions):
+    """複数の領域（mssの形式）をすべて含む最小の領域"""
+    left = min(region['left'] for region in regions)
+    top = min(region['top'] for region in regions)
+    right = max(region['left'] + region['width'] for region in regions)
+    bottom = max(region['top'] + region['height'] for region in regions)
+    return {'left': left, 'top': top, 'width': right - left, 'height': bottom - top}
+
+
+class CaptureService:
+    """画面キャプチャを担当する常駐サービス
+
+    mssのハンドルはアプリ終了まで使い回し、キャプチャ結果はコピーせずに
+    Frameとして返す。Windowsではmssのハンドルは作成したスレッドでしか使えないため、
+    別スレッドから呼ばれた場合は作り直す。
+    """
+
+    def __init__(self):
+        self._sct = None
+        self._owner_thread = None
+
+        # 統計
+        self.frames = 0
+        self.total_seconds = 0.0
+        self.last_ms = 0.0
+        self.last_bytes = 0
+        self.total_bytes = 0
+
+    def grab(self, region):
+        """指定領域をキャプチャしてFrameを返す"""
+        start = time.perf_counter()
+        current_thread = threading.get_ident()
+        if self._sct is None or self._owner_thread != current_thread:
+            # 別スレッドで作ったハンドルは閉じてから作り直す
+            self.close()
+            self._sct = mss.mss()
+            self._owner_thread = current_thread
+
+        screenshot = self._sct.grab(region)
+        bgra = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(screenshot.height, screenshot.width, 4)
+        frame = Frame(bgra, region['left'], region['top'])
+
+        elapsed = time.perf_counter() - start
+        self.frames += 1
+        self.total_seconds += elapsed
+        self.last_ms = elapsed * 1000
+        self.last_bytes = bgra.nbytes
+        self.total_bytes += bgra.nbytes
+        return frame
+
+    def stats(self):
+        """キャプチャの所要時間と確保したバイト数を返す"""
+        return {
+            'frames': self.frames,
+            'last_ms': self.last_ms,
+            'mean_ms': self.total_seconds / self.frames * 1000 if self.frames else 0.0,
+            'last_bytes': self.last_bytes,
+            'total_bytes': self.total_bytes,
+        }
+
+    def close(self):
+        """mssのハンドルを解放"""
+        if self._sct is not None:
+            try:
+                self._sct.close()
+            except Exception:
+                pass
+            self._sct = None
+
+
+# ============================================================
+# セッションの録画と再生（遅い環境の再現・計測用）
+# ============================================================
+
+SESSION_MAGIC = b'TOSESSN1'
+# レコードの先頭: 種類, タイムスタンプ, 幅, 高さ, データ長
+SESSION_RECORD = struct.Struct('<BdIII')
+SESSION_KEYFRAME = 0  # zlib圧縮したBGRA
+SESSION_DELTA = 1  # 直前のフレームとのXORをzlib圧縮
+SESSION_REPEAT = 2  # 直前のフレームと同一（データなし）
+SESSION_RESULT = 3  # OCR・翻訳結果（JSON）
+
+
+class SessionRecorder:
+    """キャプチャしたフレームと認識・翻訳結果をセッションファイルに追記
+
+    フレームは一定間隔のキーフレーム以外は直前のフレームとのXORを圧縮して
+    保存し、変化のないフレームはデータなしのレコードにするため、
+    画面がほとんど動かない長時間の録画でもファイルは小さく保たれる。
+    """
+
+    def __init__(self, path, keyframe_interval=300, compress_level=1):
+        self.path = path
+        self.keyframe_interval = keyframe_interval  # このフレーム数ごとにキーフレームを入れる
+        self.compress_level = compress_level
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(SESSION_MAGIC)
+        self._lock = threading.Lock()
+        self._previous = None
+        self._since_keyframe = 0
+
+        # 統計
+        self.frames = 0
+        self.raw_bytes = 0
+        self.written_bytes = 0
+
+    def _write(self, kind, timestamp, width, height, payload=b''):
+        self._file.write(SESSION_RECORD.pack(kind, timestamp, width, height, len(payload)))
+        self._file.write(payload)
+        self.written_bytes += SESSION_RECORD.size + len(payload)
+
+    def add_frame(self, frame):
+        """フレームを追記"""
+        bgra = np.ascontiguousarray(frame.bgra)
+        with self._lock:
+            previous = self._previous
+            if previous is not None and previous.shape == bgra.shape and np.array_equal(previous, bgra):
+                self._write(SESSION_REPEAT, frame.timestamp, frame.width, frame.height)
+            elif previous is None or previous.shape != bgra.shape or self._since_keyframe >= self.keyframe_interval:
+                self._write(SESSION_KEYFRAME, frame.timestamp, frame.width, frame.height,
+                            zlib.compress(bgra, self.compress_level))
+                self._since_keyframe = 0
+            else:
+                self._write(SESSION_DELTA, frame.timestamp, frame.width, frame.height,
+                            zlib.compress(np.bitwise_xor(bgra, previous), self.compress_level))
+            # Frameの配列は書き換えられないので参照だけ保持する
+            self._previous = bgra
+            self._since_keyframe += 1
+            self.frames += 1
+            self.raw_bytes += bgra.nbytes
+            self._file.flush()
+
+    def add_result(self, seq, original, translated):
+        """OCR・翻訳結果を追記"""
+        payload = json.dumps({'seq': seq, 'original': original, 'translated': translated},
+                             ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            self._write(SESSION_RESULT, time.time(), 0, 0, payload)
+            self._file.flush()
+
+    def close(self):
+        """ファイルを閉じる"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class SessionReader:
+    """セッションファイルをメモリマップで読み込む
+
+    開いた時にレコードの位置だけを走査し、フレームは要求された時に
+    直前のキーフレームから順に復元する（連続して読む場合は前回の続きから）。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # 空のファイル（ヘッダーを書く前に録画が終了した）はメモリマップできない
+            self._file.close()
+            raise ValueError(f"セッションファイルではありません: {path}")
+        if self._mmap[:len(SESSION_MAGIC)] != SESSION_MAGIC:
+            self.close()
+            raise ValueError(f"セッションファイルではありません: {path}")
+
+        self._records = []  # (種類, タイムスタンプ, 幅, 高さ, データ位置, データ長)
+        self.results = []
+        offset = len(SESSION_MAGIC)
+        end = len(self._mmap)
+        while offset + SESSION_RECORD.size <= end:
+            kind, timestamp, width, height, length = SESSION_RECORD.unpack_from(self._mmap, offset)
+            offset += SESSION_RECORD.size
+            if offset + length > end:
+                break  # 録画中に終了したなどで途中までしか書かれていない
+            if kind == SESSION_RESULT:
+                self.results.append(json.loads(self._mmap[offset:offset + length].decode('utf-8')))
+            else:
+                self._records.append((kind, timestamp, width, height, offset, length))
+            offset += length
+        self.timestamps = [record[1] for record in self._records]
+        self._cursor = None  # (最後に復元したフレーム番号, 配列)
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def duration(self):
+        """録画の長さ（秒）"""
+        return self.timestamps[-1] - self.timestamps[0] if self._records else 0.0
+
+    def _decode(self, index, previous):
+        kind, _, width, height, offset, length = self._records[index]
+        if kind == SESSION_REPEAT:
+            return previous
+        data = np.frombuffer(zlib.decompress(self._mmap[offset:offset + length]), dtype=np.uint8)
+        data = data.reshape(height, width, 4)
+        if kind == SESSION_DELTA:
+            return np.bitwise_xor(data, previous)
+        return data
+
+    def frame(self, index):
+        """index番目のフレームを復元"""
+        if self._cursor is not None and self._cursor[0] <= index:
+            start, array = self._cursor
+            if start == index:
+                return Frame(array, timestamp=self.timestamps[index])
+            start += 1
+        else:
+            start = index
+            while self._records[start][0] != SESSION_KEYFRAME:
+                start -= 1
+            array = None
+        for position in range(start, index + 1):
+            array = self._decode(position, array)
+        self._cursor = (index, array)
+        return Frame(array, timestamp=self.timestamps[index])
+
+    def frames(self, speed='max'):
+        """全フレームを順に返す（speed='recorded'なら録画時の間隔で待つ）"""
+        start = time.perf_counter()
+        for index in range(len(self)):
+            if speed == 'recorded':
+                delay = self.timestamps[index] - self.timestamps[0] - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            yield self.frame(index)
+
+    def close(self):
+        """メモリマップとファイルを閉じる"""
+        self._cursor = None
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+
+class ReplayCaptureService:
+    """録画したセッションをCaptureServiceの代わりにフレームとして返す
+
+    speed='recorded'なら経過時間に応じたフレーム（実際の画面と同じく途中は飛ばされる）、
+    'max'なら呼ばれるたびに次のフレームを返す。最後まで再生するとfinishedになる。
+    """
+
+    def __init__(self, reader, speed='recorded'):
+        self.reader = reader
+        self.speed = speed
+        self._start = None
+        self._next = 0
+        self.finished = len(reader) == 0
+
+        # 統計（CaptureServiceと同じ形式）
+        self.frames = 0
+        self.total_seconds = 0.0
+        self.last_ms = 0.0
+        self.last_bytes = 0
+        self.total_bytes = 0
+
+    def grab(self, region=None):
+        """次のフレームを返す（領域は録画時のまま）"""
+        start = time.perf_counter()
+        if self._start is None:
+            self._start = start
+        if self.speed == 'recorded':
+            target = self.reader.timestamps[0] + (start - self._start)
+            index = max(0, bisect.bisect_right(self.reader.timestamps, target) - 1)
+        else:
+            index = self._next
+        index = min(index, len(self.reader) - 1)
+        self._next = index + 1
+        self.finished = self._next >= len(self.reader)
+        frame = self.reader.frame(index)
+
+        elapsed = time.perf_counter() - start
+        self.frames += 1
+        self.total_seconds += elapsed
+        self.last_ms = elapsed * 1000
+        self.last_bytes = frame.bgra.nbytes
+        self.total_bytes += frame.bgra.nbytes
+        return frame
+
+    def stats(self):
+        """復元の所要時間とバイト数を返す"""
+        return {
+            'frames': self.frames,
+            'last_ms': self.last_ms,
+            'mean_ms': self.total_seconds / self.frames * 1000 if self.frames else 0.0,
+            'last_bytes': self.last_bytes,
+            'total_bytes': self.total_bytes,
+        }
+
+    def close(self):
+        """セッションファイルを閉じる"""
+        self.reader.close()
+
+
+# 表示用フォントの候補（Windowsのフォントフォルダから探される。見つからなければ次の候補）
+DISPLAY_FONT_FILES = [
+    'YuGothB.ttc', 'meiryob.ttc', 'meiryo.ttc', 'msgothic.ttc',
+    'NotoSansCJK-Bold.ttc', 'NotoSansCJKjp-Bold.otf', 'DejaVuSans-Bold.ttf',
+]
+
+
+def load_display_font(pixel_size):
+    """表示用の太字フォントを読み込む"""
+    for name in DISPLAY_FONT_FILES:
+        try:
+            return ImageFont.truetype(name, pixel_size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(pixel_size)
+    except TypeError:
+        # Pillow 10.1より前はサイズを指定できない
+        return ImageFont.load_default()
+
+
+class TextLayout:
+    """フォントの実際の文字幅で折り返し位置を決めるレイアウトエンジン
+
+    文字ごと・英単語ごとの幅をキャッシュし、折り返し結果は
+    (テキスト, 幅, フォントサイズ) ごとに保持する。日本語は禁則処理を行う。
+    """
+
+    # 行頭に置かない文字（前の行の末尾にぶら下げる）
+    LINE_START_FORBIDDEN = frozenset(
+        '、。，．,.・：；:;？！?!）)」』】〕］]｝}〉》〟’”ー々ゝゞぁぃぅぇぉっゃゅょゎァィゥェォッャュョヮヵヶ…‥'
+    )
+    # 行末に置かない文字（次の行の先頭に送る）
+    LINE_END_FORBIDDEN = frozenset('（(「『【〔［[｛{〈《〝‘“')
+
+    # 折り返しの単位: 空白 / 半角英数字と記号の並び（単語） / それ以外の1文字
+    _UNIT_PATTERN = re.compile(r'\s+|[\x21-\x7e]+|.')
+
+    def __init__(self, font, cache_size=128, max_run_cache=20000):
+        self.font = font
+        self.font_size = getattr(font, 'size', 0)
+        self._char_widths = {}
+        self._run_widths = {}
+        self.max_run_cache = max_run_cache
+        self._layouts = OrderedDict()
+        self.cache_size = cache_size
+
+    def char_width(self, char):
+        """1文字の幅（ピクセル）"""
+        width = self._char_widths.get(char)
+        if width is None:
+            width = self.font.getlength(char)
+            self._char_widths[char] = width
+        return width
+
+    def run_width(self, run):
+        """英単語など半角の並びの幅（カーニングを含めて一度に測る）"""
+        width = self._run_widths.get(run)
+        if width is None:
+            if len(self._run_widths) >= self.max_run_cache:
+                self._run_widths.clear()
+            width = self.font.getlength(run)
+            self._run_widths[run] = width
+        return width
+
+    def _unit_width(self, unit):
+        """折り返し単位の幅"""
+        if unit.isspace():
+            return self.char_width(' ') * len(unit)
+        if len(unit) == 1:
+            return self.char_width(unit)
+        return self.run_width(unit)
+
+    def wrap(self, text, max_width):
+        """テキストを指定幅（ピクセル）で折り返した行のリストを返す"""
+        key = (text, max_width, self.font_size)
+        lines = self._layouts.get(key)
+        if lines is not None:
+            self._layouts.move_to_end(key)
+            return lines
+
+        lines = []
+        for paragraph in text.split('\n'):
+            if paragraph.strip():
+                lines.extend(self._wrap_paragraph(paragraph.strip(), max_width))
+
+        self._layouts[key] = lines
+        if len(self._layouts) > self.cache_size:
+            self._layouts.popitem(last=False)
+        return lines
+
+    def _wrap_paragraph(self, paragraph, max_width):
+        """1段落を折り返す"""
+        lines = []
+        current = []  # 現在の行の (単位, 幅)
+        width = 0.0
+
+        for unit in self._UNIT_PATTERN.findall(paragraph):
+            unit_width = self._unit_width(unit)
+
+            if unit.isspace():
+                # 空白は行に収まる時だけ残し、収まらなければそこで改行する（行頭の空白は捨てる）
+                if current and width + unit_width <= max_width:
+                    current.append((unit, unit_width))
+                    width += unit_width
+                elif current:
+                    lines.append(self._join(current))
+                    current, width = [], 0.0
+                continue
+
+            if width + unit_width <= max_width:
+                current.append((unit, unit_width))
+                width += unit_width
+                continue
+
+            if current and unit in self.LINE_START_FORBIDDEN:
+                # 行頭禁則: 句読点などは前の行の末尾にぶら下げる
+                current.append((unit, unit_width))
+                lines.append(self._join(current))
+                current, width = [], 0.0
+                continue
+
+            # 行末禁則: 開き括弧などは次の行の先頭へ送る
+            carried = []
+            while len(current) > 1 and current[-1][0] in self.LINE_END_FORBIDDEN:
+                carried.insert(0, current.pop())
+            if current:
+                lines.append(self._join(current))
+            current = carried
+            width = sum(w for _, w in current)
+
+            if width + unit_width > max_width:
+                # 1単語が1行に収まらない場合は文字単位で分割
+                current, width = self._split_unit(unit, max_width, current, width, lines)
+            else:
+                current.append((unit, unit_width))
+                width += unit_width
+
+        if current:
+            lines.append(self._join(current))
+        return [line for line in lines if line]
+
+    def _split_unit(self, unit, max_width, current, width, lines):
+        """幅を超える単語を文字単位で分割して行に追加し、(現在の行, 幅) を返す"""
+        for char in unit:
+            char_width = self.char_width(char)
+            if current and width + char_width > max_width:
+                lines.append(self._join(current))
+                current, width = [], 0.0
+            current.append((char, char_width))
+            width += char_width
+        return current, width
+
+    @staticmethod
+    def _join(units):
+        """行の単位をつなげて末尾の空白を除く"""
+        return ''.join(unit for unit, _ in units).rstrip()
+
+
+class TextRenderer:
+    """翻訳テキストを白文字・縁取り付きで1枚のPIL画像に描画
+
+    折り返しはTextLayoutで実際の文字幅から計算する。縁取り（stroke）の描画が最も重いため、
+    折り返した行ごとに縁取り付きの透過画像をキャッシュし、変わった行だけを描き直す。
+    翻訳ワーカーとUIスレッドの両方から呼ばれるため、描画はロックで直列化する。
+    """
+
+    def __init__(self, font_size=14, pixel_size=None, padding=10, fill='#ffffff', outline='#1a1a2e',
+                 outline_width=2, background='black', layout_cache_size=128, line_cache_size=512):
+        self.font_size = font_size  # ポイント数
+        self.pixel_size = pixel_size or round(font_size * 96 / 72)
+        self.padding = padding
+        self.fill = fill
+        self.outline = outline
+        self.outline_width = outline_width
+        self.background = background  # Windowsの透過色（black）と同じ色で塗る
+        self.line_height = self.pixel_size + 6
+        self.layout_cache_size = layout_cache_size
+        self.line_cache_size = line_cache_size  # 縁取り付きの行の画像を保持する最大数
+        self._text_layout = None  # フォントは初めて描画する時に読み込む
+        self._line_cache = OrderedDict()  # 行 → (画像, 貼り付け位置のずれ)
+        self._lock = threading.RLock()
+        self.last_render_ms = 0.0
+        self.last_stroked_lines = 0  # 直近の描画で縁取りを描き直した行数
+
+    @property
+    def text_layout(self):
+        """折り返し計算（初回にフォントを読み込んで作成）"""
+        with self._lock:
+            if self._text_layout is None:
+                self._text_layout = TextLayout(load_display_font(self.pixel_size), cache_size=self.layout_cache_size)
+            return self._text_layout
+
+    @property
+    def font(self):
+        return self.text_layout.font
+
+    def layout(self, text, width):
+        """折り返した行のリストを返す（キャッシュ付き）"""
+        # 縁取りの分だけ左右に余裕を持たせる
+        with self._lock:
+            return self.text_layout.wrap(text, width - self.padding * 2 - self.outline_width * 2)
+
+    def _line_image(self, line):
+        """1行を縁取り付きで描画した透過画像と、描画位置からのずれ（空の行はNone）"""
+        cached = self._line_cache.get(line)
+        if cached is not None:
+            self._line_cache.move_to_end(line)
+            return cached
+        scratch = ImageDraw.Draw(Image.new('L', (1, 1)))
+        left, top, right, bottom = scratch.textbbox((0, 0), line, font=self.font, stroke_width=self.outline_width)
+        if right <= left or bottom <= top:
+            return None
+        image = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+        ImageDraw.Draw(image).text(
+            (-left, -top), line, font=self.font, fill=self.fill,
+            stroke_width=self.outline_width, stroke_fill=self.outline
+        )
+        self.last_stroked_lines += 1
+        self._line_cache[line] = (image, (left, top))
+        while len(self._line_cache) > self.line_cache_size:
+            self._line_cache.popitem(last=False)
+        return image, (left, top)
+
+    def render(self, text, width, height):
+        """テキストを描画した画像を返す（どのスレッドからも呼べる）"""
+        with self._lock:
+            start = time.perf_counter()
+            self.last_stroked_lines = 0
+            image = Image.new('RGB', (width, height), self.background)
+            y_pos = self.padding
+            for line in self.layout(text, width):
+                if y_pos + self.line_height > height:
+                    break
+                cached = self._line_image(line)
+                if cached is not None:
+                    line_image, (left, top) = cached
+                    image.paste(line_image, (self.padding + left, y_pos + top), line_image)
+                y_pos += self.line_height
+            self.last_render_ms = (time.perf_counter() - start) * 1000
+            return image
+
+    def reset(self):
+        """縁取り付きの行の画像のキャッシュを破棄"""
+        with self._lock:
+            self._line_cache.clear()
+
+
+class ScreenMemo:
+    """一度認識・翻訳した画面の結果を、画面の指紋から直接引くためのメモ（LRU）
+
+    指紋は縮小した画面の隣り合う画素の明暗（dHash）で、細かなノイズでは変わらない。
+    1行スクロールしただけの画面などは指紋が同じになるため、指紋ごとに
+    bucket_size件までの画面を縮小画像と一緒に保持し、画素差がthreshold以下の
+    ものだけを同じ画面とみなす（数字が1つ変わった画面を取り違えないように）。
+    """
+
+    def __init__(self, max_entries=64, bucket_size=4, hash_size=16, threshold=12, sample_size=(96, 48)):
+        self.max_entries = max_entries  # 保持する指紋の最大数
+        self.bucket_size = bucket_size  # 1つの指紋に保持する画面の最大数
+        self.hash_size = hash_size
+        self.threshold = threshold  # ChangeDetectorと同じ基準で「同じ画面」を判定
+        self.sample_size = sample_size
+        self._entries = OrderedDict()  # 指紋 → [(縮小画像, 原文, 訳文), ...]（新しい順）
+        self._lock = threading.Lock()
+
+        # 統計
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def fingerprint(self, frame):
+        """フレームの指紋 (キー, 縮小画像) を作成"""
+        # 緑チャンネルをビューのまま縮小し、dHashはその縮小画像から計算する
+        thumbnail = box_downsample(frame.bgra[:, :, 1], *self.sample_size)
+        small = box_downsample(thumbnail, self.hash_size + 1, self.hash_size)
+        bits = np.packbits(small[:, 1:] > small[:, :-1]).tobytes()
+        return (frame.size, bits), thumbnail
+
+    def _find(self, bucket, thumbnail):
+        for index, entry in enumerate(bucket):
+            if entry[0].shape == thumbnail.shape and int(np.abs(entry[0] - thumbnail).max()) <= self.threshold:
+                return index
+        return None
+
+    def get(self, fingerprint):
+        """同じ画面の (原文, 訳文) を返す（なければNone）"""
+        key, thumbnail = fingerprint
+        with self._lock:
+            bucket = self._entries.get(key)
+            index = self._find(bucket, thumbnail) if bucket else None
+            if index is None:
+                self.misses += 1
+                return None
+            entry = bucket.pop(index)
+            bucket.insert(0, entry)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, fingerprint, original, translated):
+        """画面の認識・翻訳結果を保存"""
+        key, thumbnail = fingerprint
+        with self._lock:
+            bucket = self._entries.setdefault(key, [])
+            index = self._find(bucket, thumbnail)
+            if index is not None:
+                del bucket[index]
+            bucket.insert(0, (thumbnail, original, translated))
+            if len(bucket) > self.bucket_size:
+                bucket.pop()
+                self.evictions += 1
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.evictions += len(evicted)
+
+    def clear(self):
+        """保存した画面をすべて破棄"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """ヒット/ミス/削除件数を返す"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': sum(len(bucket) for bucket in list(self._entries.values())),
+        }
+
+
+class TranslationCache:
+    """翻訳結果のキャッシュ（メモリ上のLRU + SQLiteファイルによる永続化）"""
+
+    def __init__(self, db_path=None, memory_size=2000, disk_size=50000):
+        self.memory_size = memory_size  # メモリに保持する最大件数
+        self.disk_size = disk_size  # SQLiteに保持する最大件数
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        # ディスクから読んだキーの最終使用時刻（読み込みのたびに書き込まず、次の保存時にまとめて反映）
+        self._touched = {}
+
+        # 統計
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    " source_lang TEXT, target_lang TEXT, source_text TEXT,"
+                    " translated TEXT, last_used REAL,"
+                    " PRIMARY KEY (source_lang, target_lang, source_text))"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_last_used ON translations (last_used)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                # 永続化できなくてもメモリキャッシュだけで動作を続ける
+                print(f"翻訳キャッシュファイルを開けません: {e}")
+                self._db = None
+
+    @staticmethod
+    def normalize(text):
+        """キャッシュキー用に空白の揺れを正規化"""
+        lines = (' '.join(line.split()) for line in text.splitlines())
+        return '\n'.join(line for line in lines if line)
+
+    def get(self, text, source, target):
+        """キャッシュから翻訳を取得（なければNone）"""
+        key = (source, target, self.normalize(text))
+        with self._lock:
+            translated = self._memory.get(key)
+            if translated is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return translated
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT translated FROM translations"
+                        " WHERE source_lang=? AND target_lang=? AND source_text=?",
+                        key
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    # 他のプロセスがロック中などで読めない時はキャッシュなしとして扱う
+                    print(f"翻訳キャッシュの読み込みに失敗しました: {e}")
+                    row = None
+                if row is not None:
+                    self.disk_hits += 1
+                    self._touched[key] = time.time()
+                    self._remember(key, row[0])
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, text, source, target, translated):
+        """翻訳結果をキャッシュに保存（空の訳は保存しない）"""
+        self.put_many([(text, translated)], source, target)
+
+    def put_many(self, items, source, target):
+        """(原文, 訳) の組をまとめて保存（SQLiteへの書き込み・件数の整理・コミットは1回だけ）"""
+        now = time.time()
+        rows = [
+            (source, target, self.normalize(text), translated)
+            for text, translated in items
+            if translated and translated.strip()
+        ]
+        if not rows:
+            return
+        with self._lock:
+            for row in rows:
+                self._remember(row[:3], row[3])
+            if self._db is not None:
+                try:
+                    self._flush_touched()
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                        [row + (now,) for row in rows]
+                    )
+                    self._prune_disk()
+                    self._db.commit()
+                    self._touched = {}
+                except sqlite3.Error as e:
+                    # 途中まで反映された変更は取り消す（最終使用時刻は次の保存で書き直す）
+                    self._rollback()
+                    print(f"翻訳キャッシュの保存に失敗しました: {e}")
+
+    def _remember(self, key, translated):
+        """メモリのLRUに追加（上限を超えたら古いものから削除）"""
+        self._memory[key] = translated
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _flush_touched(self):
+        """ディスクから読んだキーの最終使用時刻をまとめて書き込む（コミットと記録の破棄は呼び出し側）"""
+        if self._touched:
+            self._db.executemany(
+                "UPDATE translations SET last_used=?"
+                " WHERE source_lang=? AND target_lang=? AND source_text=?",
+                [(last_used,) + key for key, last_used in self._touched.items()]
+            )
+
+    def _rollback(self):
+        """未コミットの変更を取り消す"""
+        try:
+            self._db.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _prune_disk(self):
+        """SQLiteの件数が上限を超えたら最近使われていないものを削除"""
+        count = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = count - self.disk_size
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM translations WHERE rowid IN ("
+                " SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def stats(self):
+        """ヒット/ミス/削除件数を返す"""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': hits / total if total else 0.0,
+            'memory_entries': len(self._memory),
+        }
+
+    def close(self):
+        """SQLiteファイルを閉じる"""
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._flush_touched()
+                    self._db.commit()
+                    self._touched = {}
+                except sqlite3.Error as e:
+                    self._rollback()
+                    print(f"翻訳キャッシュの保存に失敗しました: {e}")
+                self._db.close()
+                self._db = None
+
+
+def split_segments(text):
+    """OCR結果を翻訳単位（行）に分割"""
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return [line for line in lines if line]
+
+
+def bounded_edit_distance(a, b, limit):
+    """編集距離（Levenshtein距離）を計算（limitを超えることが分かった時点で打ち切り、limit+1を返す）
+
+    共通の先頭・末尾を除いた残りについて、対角線からlimit以内の帯だけを計算する（O(limit×文字数)）。
+    """
+    if a == b:
+        return 0
+    over = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return over
+
+    # 共通の先頭・末尾を除く（揺れは数か所なので残りは短い）
+    start = 0
+    shortest = min(len(a), len(b))
+    while start < shortest and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < shortest - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if not a or not b:
+        return len(a) + len(b)
+
+    if len(a) > len(b):
+        a, b = b, a
+    m, n = len(a), len(b)
+    width = 2 * limit + 1
+    # previous[k] は1つ前の行の列 j = (行番号 - 1) - limit + k の値（帯の外はover）
+    previous = [j if 0 <= j <= n else over for j in range(-limit, limit + 1)]
+    for i in range(1, m + 1):
+        char = a[i - 1]
+        current = [over] * width
+        row_min = over
+        for k in range(max(0, limit - i), min(width, n - i + limit + 1)):
+            j = i - limit + k
+            if j == 0:
+                value = i
+            else:
+                value = previous[k] + (char != b[j - 1])
+                if k + 1 < width and previous[k + 1] + 1 < value:
+                    value = previous[k + 1] + 1
+                if k > 0 and current[k - 1] + 1 < value:
+                    value = current[k - 1] + 1
+            if value > over:
+                value = over
+            current[k] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous = current
+    return previous[n - m + limit]
+
+
+def line_edit_distance(old_lines, new_lines, limit):
+    """行のリスト同士の編集距離（limitを超えたらlimit+1）
+
+    同じ行はdifflibで対応付けて比較を省き、異なる部分だけを文字単位で比較する。
+    """
+    distance = 0
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        old_block = old_lines[i1:i2]
+        new_block = new_lines[j1:j2]
+        remaining = limit - distance
+        if len(old_block) == len(new_block):
+            # 行数が同じなら行ごとに比較（1行に1文字ずつの揺れでも比較範囲が広がらない）
+            for old, new in zip(old_block, new_block):
+                distance += bounded_edit_distance(old, new, limit - distance)
+                if distance > limit:
+                    return limit + 1
+        elif not old_block or not new_block:
+            # 行の追加・削除は各行の文字数と区切りの改行（残る行がなければ1つ少ない）
+            block, rest = (new_block, old_lines) if not old_block else (old_block, new_lines)
+            distance += sum(len(line) for line in block) + (len(block) if rest else len(block) - 1)
+            if distance > limit:
+                return limit + 1
+        else:
+            distance += bounded_edit_distance('\n'.join(old_block), '\n'.join(new_block), remaining)
+            if distance > limit:
+                return limit + 1
+    return distance
+
+
+class OcrJitterGate:
+    """OCR結果のわずかな揺れでは翻訳し直さないための判定
+
+    静止した画面でもアンチエイリアスや点滅するカーソルで認識結果の1〜2文字が変わることがある。
+    前回翻訳した認識結果との編集距離が文字数のthreshold倍以下（かつmax_edits以下）なら、
+    前回の訳をそのまま使う。比較の基準は翻訳した時の結果から動かさないため、
+    少しずつの変化も積み重なれば翻訳し直す。
+
+    min_lengthを指定すると、その文字数以上の文章では割合が1文字未満でも1文字の揺れを許容する
+    （短いステータス行の数字の変化も見逃すため、既定では指定しない）。
+    """
+
+    def __init__(self, threshold=0.02, max_edits=6, min_length=None):
+        self.threshold = threshold  # 許容する編集距離（文字数に対する割合。0なら同じ結果のみ）
+        self.max_edits = max_edits  # 許容する編集距離の上限（長い文章で1行分の変化を見逃さないため）
+        self.min_length = min_length  # 割合によらず1文字の揺れを許容する最小の文字数（Noneなら割合どおり）
+        self._lines = None  # 基準の認識結果（行単位・空白を正規化済み）
+        self._original = ""
+        self._translated = ""
+        self.last_distance = None  # 直近の判定の編集距離（翻訳が必要な場合はNone）
+
+    def check(self, text):
+        """揺れの範囲内なら (基準の認識結果, 前回の訳) を、翻訳が必要ならNoneを返す"""
+        self.last_distance = None
+        if self._lines is None:
+            return None
+        lines = split_segments(text)
+        length = max(sum(len(line) + 1 for line in lines), sum(len(line) + 1 for line in self._lines))
+        limit = self.limit(length)
+        distance = line_edit_distance(self._lines, lines, limit)
+        if distance > limit:
+            return None
+        self.last_distance = distance
+        return self._original, self._translated
+
+    def limit(self, length):
+        """length文字の認識結果で許容する編集距離"""
+        if self.threshold <= 0:
+            return 0
+        limit = int(length * self.threshold)
+        if self.min_length is not None and length >= self.min_length:
+            limit = max(1, limit)
+        return min(limit, self.max_edits)
+
+    def accept(self, original, translated):
+        """翻訳した結果を次回の比較の基準にする"""
+        self._lines = split_segments(original)
+        self._original = original
+        self._translated = translated
+
+    def reset(self):
+        """比較の基準を破棄"""
+        self._lines = None
+        self._original = ""
+        self._translated = ""
+
+
+class TranslatorBackend:
+    """翻訳バックエンドの基底クラス"""
+
+    name = 'base'
+    cacheable = True  # 翻訳結果を翻訳キャッシュに保存してよいか
+
+    def translate(self, text):
+        """テキストを翻訳"""
+        raise NotImplementedError
+
+    def warm_up(self):
+        """接続の確立など初回のみの処理を事前に済ませる"""
+
+    def close(self):
+        """バックエンドを解放"""
+
+
+class GoogleBackend(TranslatorBackend):
+    """Google翻訳（HTTPセッションを使い回し、タイムアウトを設定）
+
+    deep_translatorのGoogleTranslatorと同じページを取得するが、要求ごとに
+    TCP/TLS接続を作り直さないよう接続プール付きのセッションを保持する。
+    """
+
+    name = 'google'
+
+    def __init__(self, source='en', target='ja', timeout=(3.05, 10), pool_size=8):
+        self.source = source
+        self.target = target
+        self.timeout = timeout  # (接続, 読み込み) のタイムアウト秒数
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        """接続プール付きのセッションを作成（初回のみ。requestsの読み込みもここで行う）"""
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._url = translator_constants.BASE_URLS['GOOGLE_TRANSLATE']
+                self._session = session
+        return self._session
+
+    def translate(self, text):
+        text = text.strip()
+        if not text:
+            return ""
+
+        response = self._get_session().get(
+            self._url,
+            params={'sl': self.source, 'tl': self.target, 'q': text},
+            timeout=self.timeout
+        )
+        try:
+            if response.status_code == 429:
+                raise translator_errors.TooManyRequests()
+            if response.status_code != 200:
+                # 再試行するか（5xxか）をゲートウェイが判断できるよう、ステータスコードを付ける
+                error = translator_errors.RequestError(f"翻訳サービスがエラーを返しました (HTTP {response.status_code})")
+                error.status_code = response.status_code
+                raise error
+
+            soup = bs4.BeautifulSoup(response.text, 'html.parser')
+            element = soup.find('div', {'class': 't0'}) or soup.find('div', {'class': 'result-container'})
+            if not element:
+                raise translator_errors.TranslationNotFound(text)
+            return element.get_text(strip=True)
+        finally:
+            response.close()
+
+    def warm_up(self):
+        # 接続を張っておく（失敗しても翻訳時に再接続するので無視する）
+        session = self._get_session()
+        try:
+            session.head(self._url, timeout=self.timeout[0])
+        except requests.RequestException:
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+# オフライン翻訳の組み込み用語集（offline_dictionary.tsv で追加・上書きできる）
+OFFLINE_DICTIONARY = {
+    'ok': 'OK', 'cancel': 'キャンセル', 'yes': 'はい', 'no': 'いいえ',
+    'save': '保存', 'open': '開く', 'close': '閉じる', 'exit': '終了', 'quit': '終了',
+    'file': 'ファイル', 'edit': '編集', 'view': '表示', 'help': 'ヘルプ', 'tools': 'ツール',
+    'settings': '設定', 'options': 'オプション', 'search': '検索', 'delete': '削除',
+    'copy': 'コピー', 'paste': '貼り付け', 'undo': '元に戻す', 'redo': 'やり直し',
+    'error': 'エラー', 'warning': '警告', 'loading': '読み込み中', 'please wait': 'お待ちください',
+    'next': '次へ', 'back': '戻る', 'continue': '続行', 'start': '開始', 'stop': '停止',
+    'retry': '再試行', 'new': '新規', 'name': '名前', 'password': 'パスワード',
+    'sign in': 'サインイン', 'log in': 'ログイン', 'sign out': 'サインアウト', 'log out': 'ログアウト',
+    'connected': '接続済み', 'disconnected': '切断されました', 'failed': '失敗しました',
+    'success': '成功', 'complete': '完了', 'completed': '完了しました', 'player': 'プレイヤー',
+    'level': 'レベル', 'score': 'スコア', 'health': '体力', 'inventory': '持ち物',
+}
+
+
+class OfflineDictionaryBackend(TranslatorBackend):
+    """用語集による完全ローカルの翻訳（ネットワーク不要・即時）
+
+    語句を最長一致で置き換え、用語集にない語は原文のまま残す。
+    品質は低いため、結果は翻訳キャッシュに保存しない。
+    """
+
+    name = 'offline'
+    cacheable = False
+
+    def __init__(self, dictionary_path=None):
+        self.dictionary = dict(OFFLINE_DICTIONARY)
+        if dictionary_path and os.path.exists(dictionary_path):
+            # 1行に「英語<TAB>訳」の形式
+            with open(dictionary_path, encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    # 語句か訳が空の行は無視する
+                    if len(parts) == 2 and parts[0].strip() and parts[1].strip():
+                        self.dictionary[' '.join(parts[0].lower().split())] = parts[1].strip()
+        self.max_words = max(len(key.split()) for key in self.dictionary)
+
+    def translate(self, text):
+        return '\n'.join(self._translate_line(line) for line in text.splitlines())
+
+    def _translate_line(self, line):
+        """1行を最長一致で翻訳"""
+        tokens = re.findall(r"\w+(?:'\w+)?|[^\w\s]", line)
+        output = []
+        index = 0
+        while index < len(tokens):
+            for length in range(min(self.max_words, len(tokens) - index), 0, -1):
+                phrase = ' '.join(tokens[index:index + length]).lower()
+                if phrase in self.dictionary:
+                    output.append(self.dictionary[phrase])
+                    index += length
+                    break
+            else:
+                output.append(tokens[index])
+                index += 1
+
+        # 英単語の前後だけ空白を入れる（訳語同士は詰める）
+        result = ""
+        for piece in output:
+            if not piece:
+                continue
+            before = result[-1:]
+            after = piece[0]
+            if before.isalnum() and after.isalnum() and (before.isascii() or after.isascii()):
+                result += ' '
+            result += piece
+        return result
+
+
+class TranslatorUnavailableError(Exception):
+    """翻訳サービスが続けて失敗したため、しばらく要求を送らない"""
+
+
+class TokenBucket:
+    """トークンバケットによる要求数の制限（平均 rate 回/秒、最大 burst 回まで続けて送れる）"""
+
+    def __init__(self, rate=5.0, burst=10):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """トークンを1つ取得（足りなければ補充されるまで待つ）して、待った秒数を返す"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 先に予約してから待つ（同時に待つ要求も順番に間隔を空けて送られる）
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """続けて失敗したら一定時間要求を止める
+
+    failure_threshold回続けて失敗すると'open'になり、reset_timeout秒後に1回だけ試す（'half_open'）。
+    試した要求が成功すれば'closed'に戻り、失敗すれば再び止める。
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'  # 'closed'（通常）/ 'open'（停止中）/ 'half_open'（試行中）
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """要求を送ってよいか（停止時間が過ぎていれば最初の1回だけ許可）"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                return True
+            return False
+
+    def is_closed(self):
+        """通常の状態か（停止中・試行中なら再試行しない）"""
+        with self._lock:
+            return self.state == 'closed'
+
+    def remaining(self):
+        """再開を試すまでの秒数"""
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = 'closed'
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class TranslatorGateway(TranslatorBackend):
+    """翻訳サービスへの要求の流量制御（バックエンドと同じように使える）
+
+    同じ文字列の要求が処理中ならその結果を共有して通信を1回にまとめ、トークンバケットで
+    要求数を抑え、一時的なエラーは指数バックオフ（ジッター付き）で間隔を空けて再試行する。
+    続けて失敗した場合はサーキットブレーカーで一定時間要求を送らず、すぐに
+    TranslatorUnavailableErrorを返す（SegmentTranslatorはオフライン訳で暫定表示する）。
+    """
+
+    def __init__(self, backend, rate=5.0, burst=10, max_retries=2, backoff=0.5, max_backoff=8.0,
+                 failure_threshold=5, reset_timeout=30):
+        self.backend = backend
+        self.name = backend.name
+        self.cacheable = backend.cacheable
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries  # 1つの要求の再試行の回数
+        self.backoff = backoff  # 最初の再試行までの待ち時間の目安（秒、再試行ごとに2倍）
+        self.max_backoff = max_backoff
+        self._inflight = {}  # 処理中の 文字列 → Future
+        self._lock = threading.Lock()
+
+        # 統計
+        self.requests = 0  # 翻訳サービスへの送信回数
+        self.throttled = 0  # 要求数の制限で待たされた回数
+        self.retried = 0
+        self.coalesced = 0  # 処理中の同じ要求の結果を共有した回数
+        self.rejected = 0  # 停止中のため送らなかった回数
+        self.failures = 0  # 再試行しても失敗した回数
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def translate(self, text):
+        with self._lock:
+            future = self._inflight.get(text)
+            owner = future is None
+            if owner:
+                future = self._inflight[text] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._translate_with_retry(text)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[text]
+
+    def _translate_with_retry(self, text):
+        """流量制御とサーキットブレーカーを通して送信し、一時的なエラーなら再試行
+
+        サーキットブレーカーには再試行を含めた1つの要求の結果を1回として記録する。
+        """
+        for attempt in range(self.max_retries + 1):
+            # 再試行は通常の状態のときだけ（待っている間に他の要求の失敗で停止していれば送らない）
+            if not (self.breaker.allow() if attempt == 0 else self.breaker.is_closed()):
+                self._count('rejected')
+                raise TranslatorUnavailableError(
+                    f"翻訳サービスが応答しないため一時停止中です（{max(1, round(self.breaker.remaining()))}秒後に再開）"
+                )
+            if self.bucket.acquire() > 0:
+                self._count('throttled')
+            self._count('requests')
+            try:
+                result = self.backend.translate(text)
+            except Exception as e:
+                if not self._is_retryable(e):
+                    # 応答はあった（結果を読み取れなかった）のでサービスの停止とはみなさない
+                    self.breaker.record_success()
+                    self._count('failures')
+                    raise
+                if attempt == self.max_retries or not self.breaker.is_closed():
+                    self.breaker.record_failure()
+                    self._count('failures')
+                    raise
+                self._count('retried')
+                # 同時に失敗した要求が一斉に再送しないよう、待ち時間の後半をランダムにずらす
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                time.sleep(delay / 2 + random.uniform(0, delay / 2))
+            else:
+                self.breaker.record_success()
+                return result
+
+    def _is_retryable(self, error):
+        """再試行で回復しうるエラー（通信エラー・要求過多(429)・サーバーエラー(5xx)）か"""
+        if isinstance(error, translator_errors.TooManyRequests):
+            return True
+        if isinstance(error, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+        else:
+            status = getattr(error, 'status_code', None)
+        return status is not None and (status == 429 or status >= 500)
+
+    def stats(self):
+        """送信・制限・再試行・共有の回数とサーキットブレーカーの状態"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'retried': self.retried,
+                'coalesced': self.coalesced,
+                'rejected': self.rejected,
+                'failures': self.failures,
+                'circuit': self.breaker.state,
+            }
+
+    def warm_up(self):
+        self.backend.warm_up()
+
+    def close(self):
+        self.backend.close()
+
+
+def create_translator_backend(name, source='en', target='ja', timeout=10, dictionary_path=None, rate_limit=5.0):
+    """設定名から翻訳バックエンドを作成（翻訳サービスはTranslatorGatewayを通して使う）"""
+    if name == 'google':
+        return TranslatorGateway(GoogleBackend(source, target, timeout=(3.05, timeout)), rate=rate_limit)
+    if name == 'offline':
+        return OfflineDictionaryBackend(dictionary_path)
+    raise ValueError(f"不明な翻訳バックエンドです: {name}")
+
+
+class BatchTranslator:
+    """翻訳サービスへの要求をまとめる層
+
+    同じフレーム内の重複した行は1回だけ送り、行を改行区切りで文字数上限近くまで
+    詰めた要求に分けて並行に送信する。上限を超える1行は文の区切りで分割する。
+    """
+
+    # 訳文を空白なしで連結する言語
+    NO_SPACE_LANGUAGES = ('ja', 'zh-CN', 'zh-TW')
+
+    def __init__(self, translate_func, max_chars=4500, max_concurrency=4, target='ja', first_chunk_chars=600):
+        self.translate_func = translate_func  # 実際に翻訳サービスを呼び出す関数
+        self.max_chars = max_chars  # 1回の要求の最大文字数（Google翻訳の上限は5000文字）
+        # 訳し終わった行を逐次通知する時の最初の要求の最大文字数（画面上部の行を先に表示する）
+        self.first_chunk_chars = first_chunk_chars
+        self.max_concurrency = max_concurrency
+        self.target = target
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='translate')
+
+        # 統計（直近フレームと累計）
+        self.last_requests = 0
+        self.last_sent_chars = 0
+        self.total_requests = 0
+        self.total_sent_chars = 0
+        self.frames = 0
+
+    def translate_segments(self, segments, on_translated=None):
+        """行のリストを翻訳し、同じ順序で訳のリストを返す
+
+        on_translatedを渡すと、要求が1つ返るたびに訳し終わった行を {行: 訳} で通知する
+        （呼び出したスレッドで順に呼ばれる）。
+        """
+        # このフレームの送信回数と文字数（複数のスレッドから同時に呼ばれてもよいようにローカルで数える）
+        counter = {'requests': 0, 'chars': 0, 'lock': threading.Lock()}
+
+        unique = list(dict.fromkeys(segments))
+        pieces = []  # (行の番号, 送信する文字列)
+        for index, segment in enumerate(unique):
+            for piece in self._split_long(segment):
+                pieces.append((index, piece))
+
+        chunks = self._pack(
+            [piece for _, piece in pieces], self.first_chunk_chars if on_translated is not None else None
+        )
+
+        # 断片の位置 (行の番号, 行内の順番) を要求ごとに分ける
+        positions = []
+        counts = [0] * len(unique)
+        for index, _ in pieces:
+            positions.append((index, counts[index]))
+            counts[index] += 1
+        chunk_positions = []
+        start = 0
+        for chunk in chunks:
+            chunk_positions.append(positions[start:start + len(chunk)])
+            start += len(chunk)
+
+        joiner = '' if self.target in self.NO_SPACE_LANGUAGES else ' '
+        merged = [[None] * count for count in counts]
+        remaining = list(counts)  # 行ごとの未翻訳の断片の数
+        futures = {
+            self._executor.submit(self._translate_chunk, chunk, counter): chunk_index
+            for chunk_index, chunk in enumerate(chunks)
+        }
+        for future in as_completed(futures):
+            finished = {}
+            for (index, order), translated in zip(chunk_positions[futures[future]], future.result()):
+                merged[index][order] = translated
+                remaining[index] -= 1
+                if remaining[index] == 0:
+                    finished[unique[index]] = joiner.join(merged[index])
+            if on_translated is not None and finished:
+                on_translated(finished)
+        translations = dict(zip(unique, (joiner.join(parts) for parts in merged)))
+
+        self.last_requests = counter['requests']
+        self.last_sent_chars = counter['chars']
+        self.total_requests += counter['requests']
+        self.total_sent_chars += counter['chars']
+        self.frames += 1
+        return [translations[segment] for segment in segments]
+
+    def _split_long(self, segment):
+        """上限を超える行を文の区切り（長すぎる文は空白、最後は文字数）で分割"""
+        if len(segment) <= self.max_chars:
+            return [segment]
+
+        units = []
+        for sentence in re.split(r'(?<=[.!?;:])\s+', segment):
+            if len(sentence) <= self.max_chars:
+                units.append(sentence)
+                continue
+            for word in sentence.split():
+                units.extend(word[i:i + self.max_chars] for i in range(0, len(word), self.max_chars))
+
+        pieces = []
+        current = ""
+        for unit in units:
+            candidate = f"{current} {unit}" if current else unit
+            if len(candidate) > self.max_chars:
+                pieces.append(current)
+                current = unit
+            else:
+                current = candidate
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def _pack(self, pieces, first_limit=None):
+        """改行区切りで連結しても上限を超えないように要求単位にまとめる（first_limitは最初の要求のみの上限）"""
+        chunks = []
+        current = []
+        length = 0
+        limit = first_limit or self.max_chars
+        for piece in pieces:
+            added = len(piece) + (1 if current else 0)
+            if current and length + added > limit:
+                chunks.append(current)
+                limit = self.max_chars
+                current = []
+                added = len(piece)
+                length = 0
+            current.append(piece)
+            length += added
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _send(self, text, counter):
+        """翻訳サービスを1回呼び出す"""
+        with counter['lock']:
+            counter['requests'] += 1
+            counter['chars'] += len(text)
+        return self.translate_func(text) or ""
+
+    def _translate_chunk(self, chunk, counter):
+        """1回の要求分を翻訳（行数が合わなければ1行ずつ翻訳）"""
+        if len(chunk) == 1:
+            return [self._send(chunk[0], counter)]
+
+        translated = self._send('\n'.join(chunk), counter)
+        lines = [line.strip() for line in translated.splitlines() if line.strip()]
+        if len(lines) == len(chunk):
+            return lines
+
+        # 翻訳サービスが改行を結合・分割した場合は行の対応が取れないため個別に翻訳
+        return [self._send(piece, counter) for piece in chunk]
+
+    def close(self):
+        """送信用のスレッドプールを停止"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SegmentTranslator:
+    """行単位で差分翻訳し、変化した行だけを翻訳サービスに送信する
+
+    翻訳バックエンドが失敗した場合、fallbackがあればその結果を暫定表示に使う
+    （暫定の訳はキャッシュせず、次回のサイクルで改めて翻訳する）。
+    batcherを渡すと送信用のスレッドプールを他のSegmentTranslatorと共有する。
+    """
+
+    def __init__(self, backend, cache, source='en', target='ja', max_chars=4500, max_concurrency=4,
+                 fallback=None, batcher=None):
+        self.backend = backend
+        self.fallback = fallback
+        self.batcher = batcher or BatchTranslator(backend.translate, max_chars, max_concurrency, target)
+        self.cache = cache
+        self.source = source
+        self.target = target
+        self._previous = {}  # 前回サイクルの 行 → 訳
+        self.last_used_fallback = False
+
+        # 統計（直近サイクルと累計）
+        self.last_sent_chars = 0
+        self.last_total_chars = 0
+        self.total_sent_chars = 0
+        self.total_chars = 0
+
+    def translate(self, text, on_progress=None):
+        """テキストを行単位で翻訳し、訳文を元の行順に組み立てて返す
+
+        on_progressを渡すと、翻訳サービスの応答を待つ行がある間、途中経過を
+        on_progress(途中の訳文, 訳し終わった行数, 全行数) で通知する（未翻訳の行は原文のまま）。
+        最初の通知は前回の結果・翻訳キャッシュから分かる行だけで、送信前に行う。
+        """
+        segments = split_segments(text)
+        translations = {}
+        pending = []
+
+        for segment in segments:
+            if segment in translations:
+                continue
+            # 前回サイクルの結果 → 翻訳キャッシュ の順に探す
+            translated = self._previous.get(segment)
+            if translated is None:
+                translated = self.cache.get(segment, self.source, self.target)
+            if translated is None:
+                pending.append(segment)
+                translations[segment] = None
+            else:
+                translations[segment] = translated
+
+        provisional = set()
+        self.last_used_fallback = False
+        if pending:
+            on_translated = None
+            if on_progress is not None:
+                def on_translated(finished):
+                    translations.update(finished)
+                    self._notify_progress(segments, translations, on_progress)
+                self._notify_progress(segments, translations, on_progress)
+            try:
+                results = self.batcher.translate_segments(pending, on_translated)
+            except Exception:
+                if self.fallback is None:
+                    raise
+                results = [self.fallback.translate(segment) for segment in pending]
+                provisional.update(pending)
+                self.last_used_fallback = True
+
+            translations.update(zip(pending, results))
+            if self.backend.cacheable and not provisional:
+                # 1フレーム分の訳をまとめて保存（SQLiteのコミットは1回）
+                self.cache.put_many(zip(pending, results), self.source, self.target)
+        else:
+            self.batcher.last_requests = 0
+            self.batcher.last_sent_chars = 0
+
+        self._previous = {
+            segment: translated for segment, translated in translations.items()
+            if segment not in provisional
+        }
+
+        self.last_total_chars = sum(len(segment) for segment in segments)
+        self.last_sent_chars = sum(len(segment) for segment in pending)
+        self.total_chars += self.last_total_chars
+        self.total_sent_chars += self.last_sent_chars
+
+        return '\n'.join(translations[segment] for segment in segments)
+
+    def _notify_progress(self, segments, translations, on_progress):
+        """途中経過の訳文を組み立てて通知（未翻訳の行は原文を仮に表示）"""
+        done = sum(1 for segment in segments if translations[segment] is not None)
+        if done == 0:
+            return  # 訳文が1行もない途中経過は原文の表示と変わらない
+        if done == len(segments):
+            return  # 最後の行の訳は翻訳完了の結果として表示される
+        partial = '\n'.join(
+            segment if translations[segment] is None else translations[segment] for segment in segments
+        )
+        on_progress(partial, done, len(segments))
+
+    def reset(self):
+        """前回サイクルの記録を破棄"""
+        self._previous = {}
+
+    def close(self):
+        """送信用のスレッドプールとバックエンドを停止"""
+        self.batcher.close()
+        self.backend.close()
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+class LatestQueue:
+    """容量付きのキュー
+
+    満杯の時に新しい要素が来たら、最も古い要素を捨てて新しい要素を入れる
+    （処理が追いつかない時は古いフレームを待たせずに破棄する）。
+    block=Trueなら破棄せずに空きができるまで待つ（録画の再生ですべてのフレームを処理する場合）。
+    """
+
+    def __init__(self, maxsize=1, on_drop=None, block=False):
+        self.maxsize = maxsize
+        self.on_drop = on_drop  # 破棄した時に呼ぶ関数 on_drop(破棄した要素, 新しい要素)
+        self.block = block
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """要素を追加（満杯なら最も古い要素を破棄。block=Trueなら空くまで待つ）"""
+        with self._cond:
+            if self.block:
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            elif len(self._items) >= self.maxsize:
+                old = self._items.popleft()
+                self.dropped += 1
+                if self.on_drop is not None:
+                    self.on_drop(old, item)
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self):
+        """要素を取り出す（空なら待つ。閉じられたらNone）"""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()  # 空きを待っている追加側を起こす
+            return item
+
+    def qsize(self):
+        with self._cond:
+            return len(self._items)
+
+    def close(self):
+        """待っているスレッドを解放して以降の取り出しを止める"""
+        with self._cond:
+            self._closed = True
+            self._items.clear()
+            self._cond.notify_all()
+
+
+class StagePipeline:
+    """処理を段階ごとの常駐スレッドに分け、容量付きのキューでつなぐ
+
+    各段階は別々のフレームを同時に処理できる。段階の処理関数が返した値は
+    次の段階のキューに入り、Noneを返した場合はそのフレームの処理を打ち切る。
+    処理が追いつかない段階の前では、古いフレームが新しいフレームに置き換えられる
+    （block=Trueなら置き換えずに前の段階が待つ）。
+    """
+
+    def __init__(self, stages, queue_size=1, on_drop=None, on_error=None, block=False):
+        self.names = [name for name, _ in stages]
+        self.on_error = on_error  # 例外時に呼ぶ関数 on_error(段階名, 要素, 例外)
+        self.block = block
+        self.queues = [
+            LatestQueue(
+                queue_size, (lambda old, new, name=name: on_drop(name, old, new)) if on_drop else None, block
+            )
+            for name in self.names
+        ]
+        self._threads = []
+        for index, (name, func) in enumerate(stages):
+            thread = threading.Thread(target=self._run, args=(index, func), name=f'stage-{name}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, item):
+        """最初の段階に要素を投入"""
+        self.queues[0].put(item)
+
+    def can_submit(self):
+        """最初の段階のキューに空きがあるか（block=Trueの時、submitが待たされないか）"""
+        queue = self.queues[0]
+        return queue.qsize() < queue.maxsize
+
+    def depths(self):
+        """段階ごとのキューの長さ"""
+        return {name: queue.qsize() for name, queue in zip(self.names, self.queues)}
+
+    def dropped(self):
+        """段階ごとの破棄したフレーム数"""
+        return {name: queue.dropped for name, queue in zip(self.names, self.queues)}
+
+    def _run(self, index, func):
+        """段階のスレッドのメインループ"""
+        queue = self.queues[index]
+        next_queue = self.queues[index + 1] if index + 1 < len(self.queues) else None
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            try:
+                result = func(item)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(self.names[index], item, e)
+                else:
+                    print(f"{self.names[index]}でエラーが発生しました: {e}")
+                continue
+            if result is not None and next_queue is not None:
+                next_queue.put(result)
+
+    def close(self):
+        """全段階を停止（処理中のフレームは最後まで処理される）"""
+        for queue in self.queues:
+            queue.close()
+
+
+class PerfTracer:
+    """処理段階ごとの所要時間とカウンタを記録
+
+    段階ごとに直近window件の所要時間を保持してp50/p95/最大を計算する。
+    個々の計測はトレースイベントとしても保持し、JSON Lines または
+    Chromeのトレース形式（chrome://tracing、Perfetto）で書き出せる。
+    """
+
+    # HUDに表示する段階と略称
+    HUD_STAGES = [
+        ('capture', 'cap'), ('preprocess', 'pre'), ('ocr', 'ocr'),
+        ('translate', 'tr'), ('rasterize', 'rast'), ('render', 'draw'), ('first_text', '1st'),
+        ('end_to_end', 'total'),
+    ]
+
+    def __init__(self, window=200, max_events=20000):
+        self.window = window
+        self._samples = {}
+        self._events = deque(maxlen=max_events)
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage, **args):
+        """with文で囲んだ処理の所要時間を記録"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, start, **args)
+
+    def record(self, stage, seconds, start=None, **args):
+        """所要時間（秒）を記録"""
+        if start is None:
+            start = time.perf_counter() - seconds
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._events.append((stage, start, seconds, threading.get_ident(), args))
+
+    def count(self, name, amount=1):
+        """カウンタを加算"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def counter(self, name):
+        """カウンタの値"""
+        return self.counters.get(name, 0)
+
+    def summary(self):
+        """段階ごとの件数とp50/p95/最大（ミリ秒）"""
+        with self._lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self._samples.items()}
+        result = {}
+        for stage, ordered in snapshot.items():
+            if not ordered:
+                continue
+            result[stage] = {
+                'count': len(ordered),
+                'p50': ordered[len(ordered) // 2] * 1000,
+                'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'max': ordered[-1] * 1000,
+            }
+        return result
+
+    def hud_text(self):
+        """ステータスバー用の短い表示（p50/p95 ミリ秒）"""
+        summary = self.summary()
+        parts = [
+            f"{label} {summary[stage]['p50']:.0f}/{summary[stage]['p95']:.0f}"
+            for stage, label in self.HUD_STAGES if stage in summary
+        ]
+        return ' '.join(parts) if parts else "計測データなし"
+
+    def export_jsonl(self, path):
+        """計測イベントをJSON Lines形式で書き出す"""
+        with self._lock:
+            events = list(self._events)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stage, start, seconds, thread_id, args in events:
+                record = {
+                    'stage': stage,
+                    'start_ms': (start - self._origin) * 1000,
+                    'duration_ms': seconds * 1000,
+                    'thread': thread_id,
+                }
+                record.update(args)
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.write(json.dumps({'counters': dict(self.counters)}, ensure_ascii=False) + '\n')
+
+    def export_chrome_trace(self, path):
+        """計測イベントをChromeのトレース形式で書き出す"""
+        with self._lock:
+            events = list(self._events)
+        trace_events = [
+            {
+                'name': stage,
+                'ph': 'X',
+                'ts': (start - self._origin) * 1_000_000,
+                'dur': seconds * 1_000_000,
+                'pid': os.getpid(),
+                'tid': thread_id,
+                'args': args,
+            }
+            for stage, start, seconds, thread_id, args in events
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace_events, 'otherData': {'counters': dict(self.counters)}}, f)
+
+
+class TranslationRegion:
+    """名前付きの翻訳領域
+
+    自動翻訳の間隔・変化検出・スクロール追跡・OCRの揺れの判定・前回の翻訳結果は領域ごとに持ち、
+    OCRエンジン・翻訳バックエンド・翻訳キャッシュ・画面メモは全領域で共有する。
+    """
+
+    def __init__(self, name, segment_translator, scroll_ocr, interval=2000, change_threshold=12,
+                 jitter_threshold=0.02, jitter_min_length=None, window=None):
+        self.name = name
+        self.interval = interval  # 自動翻訳の間隔（ミリ秒）
+        self.change_detector = ChangeDetector(threshold=change_threshold)
+        self.ocr_gate = OcrJitterGate(threshold=jitter_threshold, min_length=jitter_min_length)
+        self.segment_translator = segment_translator
+        self.scroll_ocr = scroll_ocr
+        self.window = window  # 結果を表示するRegionWindow（メインウィンドウの領域はNone）
+        self.next_due = 0.0  # 次に自動翻訳する時刻（time.perf_counter）
+        self.shown_seq = 0  # 表示済みの最新の要求番号（これ以前の結果は破棄）
+        self.first_text_seq = 0  # 最初の訳文（途中経過を含む）を表示済みの最新の要求番号
+
+    def reset(self):
+        """変化検出・スクロール追跡・OCRの揺れの判定の基準と前回の翻訳結果を破棄"""
+        self.change_detector.reset()
+        self.scroll_ocr.reset()
+        self.ocr_gate.reset()
+        self.segment_translator.reset()
+
+
+class RegionJob:
+    """1つの領域の1フレーム分の処理状態"""
+
+    def __init__(self, region, force=False):
+        self.region = region
+        self.force = force  # 画面に変化がなくても処理する
+        self.frame = None
+        self.fingerprint = None  # ScreenMemoの指紋
+        self.ocr_input = None
+        self.original = ""
+        self.translated = ""
+        self.status = ""
+
+
+class TranslationJob:
+    """パイプラインを流れる1回のキャプチャ分の処理状態（対象の領域ごとにRegionJobを持つ）"""
+
+    def __init__(self, seq, regions, force=False):
+        self.seq = seq  # 要求の順番（古い結果を表示しないために使う）
+        self.created = time.perf_counter()
+        self.items = [RegionJob(region, force) for region in regions]
+
+
+class CanvasTextView:
+    """TextRendererで描画した文字の画像をCanvasに表示する
+
+    翻訳結果の画像はprepareで翻訳ワーカーから前もって描画し、UIスレッドのshowでは
+    PhotoImageに貼り付けるだけにする（描画中にUIのイベント処理を止めない）。
+    """
+
+    def __init__(self, canvas, renderer):
+        self.canvas = canvas
+        self.renderer = renderer
+        self.size = None  # Canvasの大きさ（UIスレッドで更新し、ワーカーはこの大きさで描画する）
+        self._photo = None  # Canvasに表示中の画像（参照を保持しないと消える）
+        self._item = None
+        self._shown_key = None  # 表示中の (テキスト, 幅, 高さ)
+        canvas.bind('<Configure>', self._on_configure, add='+')
+
+    def _on_configure(self, event):
+        if event.width > 1 and event.height > 1:
+            self.size = (event.width, event.height)
+
+    def prepare(self, text):
+        """表示する画像を描画しておく（ワーカースレッド用）
+
+        (キー, 画像) を返す。大きさが未確定・表示中と同じ内容ならNone（showで必要なら描画する）。
+        """
+        size = self.size
+        if not text or size is None:
+            return None
+        key = (text,) + size
+        if key == self._shown_key:
+            return None
+        return key, self.renderer.render(text, *size)
+
+    def show(self, text, width, height, prepared=None):
+        """テキストを表示（前回と同じ内容・サイズで描き直さなかった場合はFalse）
+
+        preparedはprepareで描画した (キー, 画像)。大きさが変わっていればここで描画し直す。
+        """
+        key = (text, width, height)
+        if key == self._shown_key:
+            return False
+        if prepared is not None and prepared[0] == key:
+            image = prepared[1]
+        else:
+            image = self.renderer.render(text, width, height)
+
+        # 同じサイズならTkの画像を作り直さずに中身だけ差し替える
+        if self._photo is not None and (self._photo.width(), self._photo.height()) == image.size:
+            self._photo.paste(image)
+        else:
+            self._photo = ImageTk.PhotoImage(image)
+            if self._item is None:
+                self._item = self.canvas.create_image(0, 0, anchor='nw', image=self._photo)
+            else:
+                self.canvas.itemconfig(self._item, image=self._photo)
+        self._shown_key = key
+        return True
+
+    def clear(self):
+        """表示中のテキストを消去"""
+        self.canvas.delete("all")
+        self._item = None
+        self._photo = None
+        self._shown_key = None
+
+
+class RegionWindow:
+    """追加の翻訳領域を示す小さなオーバーレイウィンドウ
+
+    メインウィンドウと同じく、枠の内側（Canvas）がキャプチャ範囲になり、
+    そこに翻訳結果を重ねて表示する。
+    """
+
+    header_height = 24
+    footer_height = 18
+    border = 2
+    min_width = 120
+    min_height = 40
+
+    def __init__(self, overlay, region, x, y, width, height):
+        self.overlay = overlay
+        self.region = region
+        self.drag_start_x = 0
+        self.drag_start_y = 0
+        self.initial_width = 0
+        self.initial_height = 0
+
+        self.window = tk.Toplevel(overlay.root)
+        self.window.overrideredirect(True)
+        self.window.attributes('-topmost', True)
+        self.window.attributes('-alpha', 0.85)
+        self.window.configure(bg='black')
+        self.window.attributes('-transparentcolor', 'black')
+        # 指定されたのはキャプチャ範囲なので、見出しと枠の分だけ広げる
+        self.window.geometry(
+            f"{width + self.border * 2}x{height + self.header_height + self.footer_height + self.border * 2}"
+            f"+{x - self.border}+{y - self.header_height - self.border}"
+        )
+
+        self.frame = tk.Frame(self.window, bg='#0f3460', padx=self.border, pady=self.border)
+        self.frame.pack(fill=tk.BOTH, expand=True)
+
+        # 見出し（ドラッグ用）
+        self.header = tk.Frame(self.frame, bg='#16213e', height=self.header_height)
+        self.header.pack(fill=tk.X, side=tk.TOP)
+        self.header.pack_propagate(False)
+        self.name_label = tk.Label(
+            self.header,
+            text=f"📝 {region.name}",
+            bg='#16213e',
+            fg='#e94560',
+            font=('Yu Gothic UI', 8, 'bold'),
+            cursor='fleur'
+        )
+        self.name_label.pack(side=tk.LEFT, padx=5)
+        self.close_btn = tk.Button(
+            self.header,
+            text="✕",
+            command=lambda: overlay.remove_region(region),
+            bg='#16213e',
+            fg='#e94560',
+            font=('Arial', 9, 'bold'),
+            relief=tk.FLAT,
+            cursor='hand2',
+            activebackground='#e94560',
+            activeforeground='white'
+        )
+        self.close_btn.pack(side=tk.RIGHT, padx=2)
+        self.translate_btn = tk.Button(
+            self.header,
+            text="🔄",
+            command=lambda: overlay.translate_once(regions=[region]),
+            bg='#16213e',
+            fg='white',
+            font=('Yu Gothic UI', 8),
+            relief=tk.FLAT,
+            cursor='hand2',
+            activebackground='#e94560'
+        )
+        self.translate_btn.pack(side=tk.RIGHT, padx=2)
+
+        # ステータスバー
+        self.footer = tk.Frame(self.frame, bg='#16213e', height=self.footer_height)
+        self.footer.pack(fill=tk.X, side=tk.BOTTOM)
+        self.footer.pack_propagate(False)
+        self.status_label = tk.Label(
+            self.footer,
+            text="待機中...",
+            bg='#16213e',
+            fg='#7f8c8d',
+            font=('Yu Gothic UI', 7),
+            anchor='w'
+        )
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.resize_grip = tk.Label(
+            self.footer,
+            text="⋮⋮",
+            bg='#16213e',
+            fg='#0f3460',
+            font=('Arial', 8),
+            cursor='size_nw_se'
+        )
+        self.resize_grip.pack(side=tk.RIGHT, padx=2)
+
+        # 翻訳テキスト表示用Canvas（キャプチャ範囲）
+        self.text_canvas = tk.Canvas(self.frame, bg='black', highlightthickness=0)
+        self.text_canvas.pack(fill=tk.BOTH, expand=True)
+        self.text_view = CanvasTextView(self.text_canvas, TextRenderer(
+            font_size=12, pixel_size=round(12 * overlay.root.winfo_fpixels('1i') / 72)
+        ))
+
+        for widget in (self.header, self.name_label):
+            widget.bind('<Button-1>', self._start_drag)
+            widget.bind('<B1-Motion>', self._on_drag)
+        self.resize_grip.bind('<Button-1>', self._start_resize)
+        self.resize_grip.bind('<B1-Motion>', self._on_resize)
+        self.window.bind('<F5>', lambda e: overlay.translate_once(regions=[region]))
+
+    def _start_drag(self, event):
+        """ドラッグ開始"""
+        self.drag_start_x = event.x_root - self.window.winfo_x()
+        self.drag_start_y = event.y_root - self.window.winfo_y()
+
+    def _on_drag(self, event):
+        """ドラッグ中"""
+        self.window.geometry(f"+{event.x_root - self.drag_start_x}+{event.y_root - self.drag_start_y}")
+
+    def _start_resize(self, event):
+        """右下グリップからのリサイズ開始"""
+        self.drag_start_x = event.x_root
+        self.drag_start_y = event.y_root
+        self.initial_width = self.window.winfo_width()
+        self.initial_height = self.window.winfo_height()
+
+    def _on_resize(self, event):
+        """リサイズ中"""
+        width = max(self.min_width, self.initial_width + event.x_root - self.drag_start_x)
+        height = max(self.min_height, self.initial_height + event.y_root - self.drag_start_y)
+        self.window.geometry(f"{width}x{height}")
+
+    def capture_region(self):
+        """キャプチャ範囲（Canvasの画面座標）"""
+        return {
+            'left': self.text_canvas.winfo_rootx(),
+            'top': self.text_canvas.winfo_rooty(),
+            'width': max(1, self.text_canvas.winfo_width()),
+            'height': max(1, self.text_canvas.winfo_height()),
+        }
+
+    def display_text(self, text, prepared=None):
+        """翻訳テキストを表示（preparedはワーカーで描画済みの画像）"""
+        if not text:
+            self.text_view.clear()
+            return
+        start = time.perf_counter()
+        width = max(1, self.text_canvas.winfo_width())
+        height = max(1, self.text_canvas.winfo_height())
+        if self.text_view.show(text, width, height, prepared):
+            self.overlay.tracer.record('render', time.perf_counter() - start, start, region=self.region.name)
+        else:
+            self.overlay.tracer.count('skipped_renders')
+
+    def clear(self):
+        """表示中のテキストを消去"""
+        self.text_view.clear()
+
+    def destroy(self):
+        """ウィンドウを閉じる"""
+        self.window.destroy()
+
+
+def parse_region_spec(spec):
+    """--region の値 "名前=幅x高さ+X+Y[@間隔ミリ秒]" を (名前, x, y, 幅, 高さ, 間隔) に変換"""
+    match = re.fullmatch(r'(.+?)=(\d+)x(\d+)([+-]\d+)([+-]\d+)(?:@(\d+))?', spec.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"領域の指定が正しくありません: {spec}（例: チャット=400x300+50+600@1000）")
+    name, width, height, x, y, interval = match.groups()
+    return name, int(x), int(y), int(width), int(height), int(interval) if interval else None
 
 
 class TranslatorOverlay:
     """翻訳オーバーレイアプリのメインクラス"""
 
-    def __init__(self):
+    def __init__(self, replay_path=None, replay_speed='recorded', startup_log=None, regions=None):
+        # 起動時間の計測（init: モジュール読み込み完了, window: ウィンドウ表示, ready: 翻訳可能）
+        self.startup_times = {'init': time.perf_counter() - STARTUP_TIME}
+        self.startup_log = startup_log  # 起動時間を追記するファイル（JSON Lines）
         self.root = tk.Tk()
         self.root.title("翻訳オーバーレイ")
 
@@ -83,12 +3021,206 @@ class TranslatorOverlay:
         self.translated_text = ""
         self.original_text = ""
 
+        # 処理時間の計測（F8でステータスバーに表示、F9でトレースを保存）
+        self.tracer = PerfTracer()
+        self.show_hud = False
+        self.hud_job = None
+        self.trace_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'traces')
+
+        # 翻訳設定とキャッシュ（main.pyと同じフォルダに保存）
+        self.source_lang = 'en'
+        self.target_lang = 'ja'
+        self.translation_cache = TranslationCache(
+            db_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translation_cache.db'),
+            memory_size=2000,
+            disk_size=50000
+        )
+
+        # 翻訳バックエンド（'google' / 'offline'）
+        self.translator_backend_name = 'google'
+        self.translation_timeout = 10  # 翻訳サービスの応答待ちの上限（秒）
+        self.translation_rate_limit = 5.0  # 翻訳サービスへの1秒あたりの要求数の上限（平均）
+        self.offline_fallback = True  # 翻訳サービスが使えない時は用語集で暫定表示
+        self.offline_dictionary_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'offline_dictionary.tsv'
+        )
+        self.translator_backend = create_translator_backend(
+            self.translator_backend_name, self.source_lang, self.target_lang,
+            timeout=self.translation_timeout, dictionary_path=self.offline_dictionary_path,
+            rate_limit=self.translation_rate_limit
+        )
+        fallback = None
+        if self.offline_fallback and self.translator_backend.name != 'offline':
+            fallback = OfflineDictionaryBackend(self.offline_dictionary_path)
+        self.segment_translator = SegmentTranslator(
+            self.translator_backend, self.translation_cache,
+            source=self.source_lang, target=self.target_lang, fallback=fallback
+        )
+
+        # 画面のメモ（ウィンドウを切り替えて戻った時などに、同じ画面の結果をそのまま表示）
+        self.screen_memo_size = 64  # 覚えておく画面の数
+        self.screen_memo = ScreenMemo(max_entries=self.screen_memo_size)
+
+        # 変化検出（自動翻訳時、画面に変化がなければOCR・翻訳を省略。基準は領域ごとに持つ）
+        self.change_threshold = 12  # 変化検出のしきい値（縮小画像の画素差 0-255）
+        # OCRの揺れ（前回翻訳した認識結果との編集距離が文字数のこの割合以下）なら前回の訳を使う
+        self.ocr_jitter_threshold = 0.02
+        # この文字数以上なら割合が1文字未満でも1文字の揺れを許容する（Noneなら割合どおり）
+        self.ocr_jitter_min_length = None
+
+        # キャプチャとOCR
+        # replay_pathを指定すると画面の代わりに録画したセッションを再生する
+        self.replay_path = replay_path
+        if replay_path:
+            self.capture_service = ReplayCaptureService(SessionReader(replay_path), speed=replay_speed)
+        else:
+            self.capture_service = CaptureService()
+        # セッションの録画（F10で開始/停止）
+        self.session_recorder = None
+        self.session_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sessions')
+        self.ocr_engine_name = 'auto'  # 'auto' / 'tesserocr' / 'pytesseract'
+        # エンジンの作成（言語モデルの読み込み）はウォームアップか最初のOCRまで遅らせる
+        self.ocr_engine = LazyOcrEngine(self.ocr_engine_name)
+        # OCR前の画像処理（各ステップの効果は benchmark.py preprocess で確認できる）
+        self.preprocessor = Preprocessor(
+            grayscale=True,
+            auto_invert=True,
+            contrast='stretch',
+            normalize_scale=True,
+            target_text_height=32
+        )
+        # テキスト領域検出（'auto'なら全画面時と大きな領域のみ / 'always' / 'never'）
+        self.text_region_mode = 'auto'
+        self.text_region_min_pixels = 1_000_000
+        self.text_region_detector = TextRegionDetector()
+        # 並列OCR（大きな領域のみ。1なら並列化しない）
+        self.ocr_workers = min(8, os.cpu_count() or 1)
+        self.parallel_ocr_min_pixels = 1_000_000
+        self.parallel_ocr = ParallelOcr(self.ocr_workers, engine_name=self.ocr_engine_name)
+        # スクロールしただけの画面は新しく現れた部分だけOCR（テキスト領域検出・並列OCRを使わない大きさのみ）
+        self.scroll_tracking = True
+        self.scroll_ocr = ScrollOcr(self.ocr_engine, self.preprocessor)
+
+        # 翻訳領域（メインウィンドウの領域と、＋ボタン/--regionで追加した領域）
+        # 間隔が来た領域はまとめて1回だけ撮影し、領域ごとに切り出して処理する
+        self.main_region = TranslationRegion(
+            'main', self.segment_translator, self.scroll_ocr,
+            interval=self.auto_translate_interval, change_threshold=self.change_threshold,
+            jitter_threshold=self.ocr_jitter_threshold, jitter_min_length=self.ocr_jitter_min_length
+        )
+        self.regions = [self.main_region]
+        self.region_slack = 0.05  # この秒数以内に間隔が来る領域は同じキャプチャにまとめる
+        # 複数の領域のOCR・翻訳を並行実行する共有のスレッドプール
+        self.region_pool = ThreadPoolExecutor(max_workers=self.ocr_workers, thread_name_prefix='region')
+
+        # キャプチャ→前処理→OCR→翻訳 を段階ごとのスレッドで並行実行し、結果は描画待ちに置く
+        self.job_sequence = 0  # 最後に発行した要求の番号
+        self._render_lock = threading.Lock()
+        self._render_pending = {}  # 領域ごとの描画待ちの最新の結果（翻訳途中の訳文を含む）
+        self.render_interval = 16  # 描画の最短間隔（ミリ秒）。途中経過が続けて届いても1フレームに1回だけ描画
+        self._last_render = 0.0
+        self.show_pipeline_debug = False  # ステータスバーにキューの長さを表示（F7で切替）
+        self.pipeline = StagePipeline(
+            [
+                ('capture', self._stage_capture),
+                ('preprocess', self._stage_preprocess),
+                ('ocr', self._stage_ocr),
+                ('translate', self._stage_translate),
+            ],
+            queue_size=1,
+            on_drop=self._on_job_dropped,
+            on_error=self._on_stage_error,
+            # 録画を最速で再生する時はフレームを破棄しない（何度再生しても同じフレームを処理する）
+            block=bool(replay_path) and replay_speed == 'max'
+        )
+
+        # 翻訳テキストの描画
+        font_size = 14
+        self.text_renderer = TextRenderer(
+            font_size=font_size, pixel_size=round(font_size * self.root.winfo_fpixels('1i') / 72)
+        )
+
         # UIを構築
         self._create_ui()
 
         # イベントバインド
         self._bind_events()
 
+        # 起動時に指定された領域
+        for name, x, y, width, height, interval in regions or []:
+            self.add_region(name, x, y, width, height, interval)
+
+        # ライブラリの読み込みとエンジンのウォームアップはウィンドウを表示した後に行う（run()から開始）
+
+    def _on_window_shown(self):
+        """ウィンドウの表示後に呼ばれる（UIスレッドで実行）"""
+        self.root.update_idletasks()
+        self.startup_times['window'] = time.perf_counter() - STARTUP_TIME
+        self.tracer.record('startup.window', self.startup_times['window'], STARTUP_TIME)
+        threading.Thread(target=self._warm_up_engines, name='warm-up', daemon=True).start()
+
+    def _warm_up_steps(self):
+        """ウォームアップの手順 (表示名, 処理) のリスト"""
+        def warm_up_image_processing():
+            # NumPy・PILの読み込みと、前処理・変化検出・描画の初回実行
+            frame = Frame.from_image(Image.new('RGB', (64, 32), 'white'))
+            self.preprocessor.process(frame)
+            ChangeDetector().has_changed(frame)
+            self.text_renderer.layout("準備 warm up", 200)
+
+        return [
+            ("画像処理", warm_up_image_processing),
+            ("OCRエンジン", self.ocr_engine.warm_up),
+            ("翻訳サービス", self.translator_backend.warm_up),
+        ]
+
+    def _warm_up_engines(self):
+        """ライブラリを読み込み、OCRエンジンと翻訳バックエンドを事前に初期化（バックグラウンドで実行）"""
+        steps = self._warm_up_steps()
+        failed = []
+        for index, (label, warm_up) in enumerate(steps, 1):
+            self._post_startup_status(f"⏳ 準備中: {label} ({index}/{len(steps)})")
+            start = time.perf_counter()
+            try:
+                warm_up()
+            except Exception as e:
+                failed.append(label)
+                print(f"{label}のウォームアップに失敗しました: {e}")
+            self.tracer.record(f'startup.{label}', time.perf_counter() - start, start)
+
+        self.startup_times['ready'] = time.perf_counter() - STARTUP_TIME
+        self.tracer.record('startup.ready', self.startup_times['ready'], STARTUP_TIME)
+        if failed:
+            self._post_startup_status(f"⚠ {'・'.join(failed)}を準備できませんでした（翻訳時に再試行します）")
+        else:
+            self._post_startup_status(
+                f"✅ 準備完了（表示 {self.startup_times['window']:.2f}秒 / 翻訳可能 {self.startup_times['ready']:.2f}秒）"
+            )
+        self._log_startup_times()
+
+    def _post_startup_status(self, text):
+        """ウォームアップの進み具合を表示（翻訳を始めた後は表示しない）"""
+        def update():
+            if self.job_sequence == 0:
+                self.status_label.config(text=text)
+        self.root.after(0, update)
+
+    def _log_startup_times(self):
+        """起動時間をコンソールに表示し、指定があればJSON Linesで追記"""
+        times = self.startup_times
+        try:
+            print(f"Startup: init {times['init']:.2f}s / window {times['window']:.2f}s / ready {times['ready']:.2f}s")
+        except UnicodeEncodeError:
+            pass
+        if self.startup_log:
+            record = {'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+            record.update({f'{key}_s': round(value, 4) for key, value in times.items()})
+            try:
+                with open(self.startup_log, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError as e:
+                print(f"起動時間を記録できませんでした: {e}")
+
     def _create_ui(self):
         """UIコンポーネントを作成"""
 
@@ -225,6 +3357,21 @@ class TranslatorOverlay:
         )
         self.clear_btn.pack(side=tk.LEFT, padx=5)
 
+        # 領域追加ボタン
+        self.add_region_btn = tk.Button(
+            self.button_frame,
+            text="＋ 領域",
+            command=self.ask_add_region,
+            bg='#0f3460',
+            fg='white',
+            font=('Yu Gothic UI', 9, 'bold'),
+            relief=tk.FLAT,
+            cursor='hand2',
+            padx=10,
+            activebackground='#e94560'
+        )
+        self.add_region_btn.pack(side=tk.LEFT, padx=5)
+
         # コンテンツエリア（翻訳結果表示用）
         self.content_frame = tk.Frame(self.main_frame, bg='black')
         self.content_frame.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
@@ -236,6 +3383,7 @@ class TranslatorOverlay:
             highlightthickness=0
         )
         self.text_canvas.pack(fill=tk.BOTH, expand=True)
+        self.text_view = CanvasTextView(self.text_canvas, self.text_renderer)
 
         # ステータスバー
         self.status_bar = tk.Frame(self.main_frame, bg='#16213e', height=25)
@@ -261,6 +3409,15 @@ class TranslatorOverlay:
         )
         self.size_label.pack(side=tk.RIGHT, padx=10, pady=2)
 
+        # 処理時間の表示（F8で表示/非表示）
+        self.hud_label = tk.Label(
+            self.status_bar,
+            text="",
+            bg='#16213e',
+            fg='#e94560',
+            font=('Consolas', 8)
+        )
+
         # リサイズグリップ（右下）
         self.resize_grip = tk.Label(
             self.status_bar,
@@ -314,7 +3471,13 @@ class TranslatorOverlay:
         self.root.bind('<Escape>', lambda e: self.close_app())
         self.root.bind('<F5>', lambda e: self.translate_once())
         self.root.bind('<F6>', lambda e: self.toggle_auto_translate())
+        self.root.bind('<F7>', lambda e: self.toggle_pipeline_debug())
+        self.root.bind('<F8>', lambda e: self.toggle_hud())
+        self.root.bind('<F9>', lambda e: self.export_traces())
+        self.root.bind('<F10>', lambda e: self.toggle_recording())
         self.root.bind('<F11>', lambda e: self.toggle_fullscreen())
+        self.root.bind('<plus>', lambda e: self.ask_add_region())
+        self.root.bind('<KP_Add>', lambda e: self.ask_add_region())
 
     def _start_drag(self, event):
         """ドラッグ開始"""
@@ -460,8 +3623,11 @@ class TranslatorOverlay:
         """リサイズ終了"""
         self.is_resizing = False
 
-    def capture_screen(self):
-        """ウィンドウ位置のスクリーンショットを撮影"""
+    def _capture_region_of(self, region):
+        """領域のキャプチャ範囲（画面座標）"""
+        if region.window is not None:
+            return region.window.capture_region()
+
         # ウィンドウの位置とサイズを取得
         x = self.root.winfo_x()
         y = self.root.winfo_y()
@@ -473,34 +3639,96 @@ class TranslatorOverlay:
         status_height = 25
 
         # キャプチャ領域（コンテンツ部分のみ）
-        capture_region = {
+        return {
             'left': x + 2,
             'top': y + control_height,
             'width': width - 4,
             'height': height - control_height - status_height - 4
         }
 
-        with mss.mss() as sct:
-            # 一時的にウィンドウを非表示にしてスクリーンショット
-            self.root.withdraw()
+    def capture_regions(self, regions):
+        """複数の領域を囲む範囲を1回だけ撮影し、領域ごとに切り出す
+
+        (撮影したFrame, 領域ごとのFrameのリスト) を返す。撮影範囲と重ならない領域はNone。
+        """
+        capture_regions = [self._capture_region_of(region) for region in regions]
+
+        if self.replay_path:
+            # 再生中は画面を撮らないのでウィンドウを隠す必要もない
+            # （メインの領域には録画したフレーム全体、追加の領域には同じ画面座標の部分を渡す）
+            with self.tracer.span('capture.grab'):
+                frame = self.capture_service.grab(capture_regions[0])
+            return frame, [
+                frame if region is self.main_region else frame.crop_region(capture_region)
+                for region, capture_region in zip(regions, capture_regions)
+            ]
+
+        # 一時的にすべてのウィンドウを非表示にしてスクリーンショット
+        windows = [self.root] + [region.window.window for region in list(self.regions) if region.window is not None]
+        with self.tracer.span('capture.hide'):
+            for window in windows:
+                window.withdraw()
             time.sleep(0.05)  # ウィンドウが非表示になるのを待つ
 
-            try:
-                screenshot = sct.grab(capture_region)
-                img = Image.frombytes('RGB', screenshot.size, screenshot.bgra, 'raw', 'BGRX')
-            finally:
-                self.root.deiconify()
+        try:
+            with self.tracer.span('capture.grab', regions=len(regions)):
+                frame = self.capture_service.grab(union_region(capture_regions))
+        finally:
+            for window in windows:
+                window.deiconify()
 
-        return img
+        return frame, [frame.crop_region(capture_region) for capture_region in capture_regions]
 
-    def perform_ocr(self, image):
-        """画像からテキストを抽出"""
+    def capture_screen(self):
+        """ウィンドウ位置のスクリーンショットを撮影してFrameを返す"""
+        return self.capture_regions([self.main_region])[1][0]
+
+    def _region_detector_for(self, frame):
+        """このフレームでテキスト領域検出を使うか判定"""
+        if self.text_region_mode == 'always':
+            return self.text_region_detector
+        if self.text_region_mode == 'auto' and (
+                self.is_fullscreen or frame.width * frame.height >= self.text_region_min_pixels):
+            return self.text_region_detector
+        return None
+
+    def _parallel_ocr_for(self, frame):
+        """このフレームで並列OCRを使うか判定"""
+        if self.ocr_workers > 1 and frame.width * frame.height >= self.parallel_ocr_min_pixels:
+            return self.parallel_ocr
+        return None
+
+    def perform_ocr(self, frame):
+        """Frameからテキストを抽出"""
+        return self._recognize(self._prepare_ocr(frame))
+
+    def _prepare_ocr(self, frame, region=None):
+        """前処理してOCRに渡す画像を作成（regionを省略するとメインウィンドウの領域）"""
+        scroll_ocr = (region or self.main_region).scroll_ocr
+        region_detector = self._region_detector_for(frame)
+        parallel = self._parallel_ocr_for(frame)
+        scroll = None
+        if self.scroll_tracking and region_detector is None and parallel is None:
+            scroll = (frame, row_hashes(frame.gray()))
+            if scroll_ocr.shift_for(scroll[1]) is not None:
+                # スクロールしただけなら新しく現れた部分だけをOCR段階で前処理する
+                return None, False, None, scroll
+        images, from_regions = prepare_ocr_images(frame, self.preprocessor, region_detector)
+        return images, from_regions, parallel, scroll
+
+    def _recognize(self, ocr_input, region=None):
+        """_prepare_ocrで作成した画像からテキストを抽出"""
+        images, from_regions, parallel, scroll = ocr_input
+        scroll_ocr = (region or self.main_region).scroll_ocr
         try:
-            # OCR設定（英語テキスト用）
-            custom_config = r'--oem 3 --psm 6 -l eng'
-            text = pytesseract.image_to_string(image, config=custom_config)
+            if scroll is not None:
+                frame, hashes = scroll
+                text = scroll_ocr.recognize(frame, hashes, images[0] if images else None)
+            else:
+                scroll_ocr.reset()
+                text = recognize_ocr_images(images, from_regions, self.ocr_engine.recognize, parallel)
             return text.strip()
-        except pytesseract.TesseractNotFoundError:
+        except (pytesseract.TesseractNotFoundError, OcrUnavailableError):
             raise Exception(
                 "Tesseract OCRが見つかりません。\n"
                 "1. Tesseractをインストールしてください:\n"
@@ -510,27 +3738,23 @@ class TranslatorOverlay:
         except Exception as e:
             raise Exception(f"OCRエラー: {str(e)}")
 
-    def translate_text(self, text):
-        """英語を日本語に翻訳"""
+    def translate_text(self, text, region=None, on_progress=None):
+        """英語を日本語に翻訳（前回から変化した行だけを翻訳サービスに送信）"""
         if not text:
             return ""
 
         try:
-            translator = GoogleTranslator(source='en', target='ja')
-            translated = translator.translate(text)
-            return translated
+            return (region or self.main_region).segment_translator.translate(text, on_progress)
         except Exception as e:
             raise Exception(f"翻訳エラー: {str(e)}")
 
-    def display_text(self, text, original=""):
-        """翻訳テキストを表示"""
-        self.text_canvas.delete("all")
-
+    def display_text(self, text, original="", prepared=None):
+        """翻訳テキストを表示（縁取り付きの文字を1枚の画像として描画。preparedはワーカーで描画済みの画像）"""
         if not text:
+            self._clear_canvas()
             return
 
         # Canvas サイズを取得
-        self.text_canvas.update_idletasks()
         canvas_width = self.text_canvas.winfo_width()
         canvas_height = self.text_canvas.winfo_height()
 
@@ -538,105 +3762,457 @@ class TranslatorOverlay:
             canvas_width = self.window_width - 4
             canvas_height = self.window_height - 65
 
-        # テキストを描画（白文字に黒縁取り効果）
-        padding = 10
-        font_size = 14
-        line_height = font_size + 8
-
-        # テキストを行に分割（長い行は折り返し）
-        lines = self._wrap_text(text, canvas_width - padding * 2, font_size)
-
-        y_pos = padding
-        for line in lines:
-            if y_pos + line_height > canvas_height:
-                break
-
-            # 縁取り効果（黒い影を4方向に）
-            for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1), (-2, 0), (2, 0), (0, -2), (0, 2)]:
-                self.text_canvas.create_text(
-                    padding + dx, y_pos + dy,
-                    text=line,
-                    anchor='nw',
-                    fill='#1a1a2e',
-                    font=('Yu Gothic UI', font_size, 'bold')
-                )
+        start = time.perf_counter()
+        if not self.text_view.show(text, canvas_width, canvas_height, prepared):
+            # 前回と同じ内容・サイズなので描き直さない
+            self.tracer.count('skipped_renders')
+            return
+        self.tracer.record('render', time.perf_counter() - start, start)
+
+    def _clear_canvas(self):
+        """表示中のテキストを消去"""
+        self.text_view.clear()
 
-            # メインテキスト（白）
-            self.text_canvas.create_text(
-                padding, y_pos,
-                text=line,
-                anchor='nw',
-                fill='#ffffff',
-                font=('Yu Gothic UI', font_size, 'bold')
+    def _frame_stats_text(self):
+        """スキップ/処理回数とキャッシュ命中率の表示用文字列"""
+        cache_stats = self.translation_cache.stats()
+        text = (
+            f"スキップ {self.tracer.counter('skipped_frames')} / 処理 {self.tracer.counter('processed_frames')}"
+            f" | キャッシュ {cache_stats['hit_rate']:.0%}"
+        )
+        if self.show_pipeline_debug:
+            depths = self.pipeline.depths()
+            depths['render'] = len(self._render_pending)
+            queues = ' '.join(f"{name}:{depth}" for name, depth in depths.items())
+            text += (
+                f" | キュー {queues} | 破棄 {self.tracer.counter('dropped_frames')}"
+                f" | スクロール {self.tracer.counter('scrolled_frames')}"
+                f" | 揺れ {self.tracer.counter('ocr_jitter_frames')}/{self.tracer.counter('ocr_changed_frames')}"
+                f" | 画面メモ {self.screen_memo.stats()['hit_rate']:.0%}"
             )
+            if isinstance(self.translator_backend, TranslatorGateway):
+                gateway = self.translator_backend.stats()
+                text += (
+                    f" | 送信 {gateway['requests']} 制限 {gateway['throttled']} 再試行 {gateway['retried']}"
+                    f" 共有 {gateway['coalesced']} 停止 {gateway['rejected']} ({gateway['circuit']})"
+                )
+        return text
 
-            y_pos += line_height
+    def translate_once(self, skip_unchanged=False, regions=None):
+        """一度だけ翻訳を実行（skip_unchanged=Trueなら画面に変化がない領域は何もしない）
 
-    def _wrap_text(self, text, max_width, font_size):
-        """テキストを指定幅で折り返し"""
-        # 簡易的な文字数ベースの折り返し
-        chars_per_line = max(10, int(max_width / (font_size * 0.8)))
+        regionsを省略するとメインウィンドウの領域を翻訳する。
+        """
+        regions = regions or [self.main_region]
+        if not skip_unchanged:
+            for region in regions:
+                self._status_label_for(region).config(text="🔍 スクリーンショットを取得中...")
+            self.root.update()
 
-        lines = []
-        for paragraph in text.split('\n'):
-            if not paragraph.strip():
+        self.job_sequence += 1
+        self.pipeline.submit(TranslationJob(self.job_sequence, regions, force=not skip_unchanged))
+
+    def _map_items(self, func, items):
+        """領域ごとの処理を共有のスレッドプールで並行実行（1領域なら呼び出したスレッドで実行）"""
+        if len(items) == 1:
+            return [func(items[0])]
+        return list(self.region_pool.map(func, items))
+
+    def _stage_capture(self, job):
+        """キャプチャ段階: 対象の領域をまとめて撮影し、変化がない領域は打ち切る"""
+        # 要求の後に閉じられた領域は撮影しない
+        job.items = [item for item in job.items if item.region in self.regions]
+        if not job.items:
+            return None
+        with self.tracer.span('capture', seq=job.seq, regions=len(job.items)):
+            frame, frames = self.capture_regions([item.region for item in job.items])
+        recorder = self.session_recorder
+        if recorder is not None:
+            with self.tracer.span('record', seq=job.seq):
+                recorder.add_frame(frame)
+        if self.replay_path and self.capture_service.finished:
+            self.root.after(0, self._on_replay_finished)
+
+        items = []
+        for item, region_frame in zip(job.items, frames):
+            if region_frame is None:
                 continue
-            while len(paragraph) > chars_per_line:
-                lines.append(paragraph[:chars_per_line])
-                paragraph = paragraph[chars_per_line:]
-            if paragraph:
-                lines.append(paragraph)
+            item.frame = region_frame
+            if self._check_region_frame(job, item):
+                items.append(item)
+        job.items = items
+        return job if items else None
 
-        return lines
+    def _check_region_frame(self, job, item):
+        """変化検出と画面メモの確認（OCR・翻訳が必要ならTrue）"""
+        region = item.region
 
-    def translate_once(self):
-        """一度だけ翻訳を実行"""
-        self.status_label.config(text="🔍 スクリーンショットを取得中...")
-        self.root.update()
+        # 変化検出（変化がなければOCR・翻訳を省略）
+        with self.tracer.span('change_detect', seq=job.seq):
+            changed = region.change_detector.has_changed(item.frame)
+        if not item.force and not changed:
+            self.tracer.count('skipped_frames')
+            item.frame = None
+            self._post_status(job.seq, f"⏭ 変化なし | {self._frame_stats_text()}", region)
+            return False
 
-        def do_translate():
-            try:
-                # スクリーンショット取得
-                image = self.capture_screen()
+        # 以前に認識・翻訳した画面なら、OCRも翻訳もせずにその結果を表示
+        # （手動翻訳では読み直すため参照しないが、指紋は結果の記録に使う）
+        with self.tracer.span('screen_memo', seq=job.seq):
+            item.fingerprint = self.screen_memo.fingerprint(item.frame)
+            memo = None if item.force else self.screen_memo.get(item.fingerprint)
+        if memo is not None:
+            self.tracer.count('memo_frames')
+            item.frame = None
+            item.original, item.translated = memo
+            item.status = f"♻ 以前と同じ画面の翻訳を表示 | {self._frame_stats_text()}"
+            self._queue_render(job, item)
+            return False
+        self.tracer.count('processed_frames')
+        return True
 
-                self.root.after(0, lambda: self.status_label.config(text="📖 テキストを認識中..."))
+    def _stage_preprocess(self, job):
+        """前処理段階: OCRに渡す画像を作成"""
+        def prepare(item):
+            self._post_status(job.seq, "📖 テキストを認識中...", item.region)
+            item.ocr_input = self._prepare_ocr(item.frame, item.region)
+            item.frame = None
 
-                # OCR実行
-                original = self.perform_ocr(image)
+        with self.tracer.span('preprocess', seq=job.seq):
+            self._map_items(prepare, job.items)
+        return job
 
-                if not original:
-                    self.root.after(0, lambda: self.status_label.config(text="⚠ テキストが検出されませんでした"))
-                    return
+    def _stage_ocr(self, job):
+        """OCR段階"""
+        def recognize(item):
+            item.original = self._recognize(item.ocr_input, item.region)
+            if item.ocr_input[3] is not None and item.region.scroll_ocr.last_shift:
+                self.tracer.count('scrolled_frames')
+            item.ocr_input = None
 
-                self.root.after(0, lambda: self.status_label.config(text="🌐 翻訳中..."))
+        with self.tracer.span('ocr', seq=job.seq):
+            self._map_items(recognize, job.items)
 
-                # 翻訳実行
-                translated = self.translate_text(original)
+        items = []
+        for item in job.items:
+            if not item.original:
+                self._post_status(job.seq, "⚠ テキストが検出されませんでした", item.region)
+                continue
+            self._post_status(job.seq, "🌐 翻訳中...", item.region)
+            items.append(item)
+        job.items = items
+        return job if items else None
 
-                self.original_text = original
-                self.translated_text = translated
+    def _stage_translate(self, job):
+        """翻訳段階: 翻訳して描画待ちに置く"""
+        def translate(item):
+            region = item.region
+            # 前回翻訳した認識結果からわずかに揺れただけなら翻訳し直さない（手動実行を除く）
+            reuse = None
+            if not item.force:
+                with self.tracer.span('ocr_gate', seq=job.seq):
+                    reuse = region.ocr_gate.check(item.original)
+            if reuse is not None:
+                self._reuse_translation(job, item, reuse)
+                return
+            self.tracer.count('ocr_changed_frames')
 
-                # UIスレッドで表示を更新
-                self.root.after(0, lambda: self.display_text(translated, original))
-                self.root.after(0, lambda: self.status_label.config(
-                    text=f"✅ 翻訳完了 | 元: {len(original)}文字 → 訳: {len(translated)}文字"
-                ))
+            def on_progress(partial, done, total):
+                # キャッシュ済みの行と訳し終わった行から順に表示（未翻訳の行は原文のまま）
+                self._queue_render(job, item, (partial, f"🌐 翻訳中... ({done}/{total}行)"))
 
-            except Exception as e:
-                self.root.after(0, lambda: self.status_label.config(text=f"❌ エラー: {str(e)[:50]}"))
-                self.root.after(0, lambda: messagebox.showerror("エラー", str(e)))
+            with self.tracer.span('translate', seq=job.seq, chars=len(item.original)):
+                item.translated = self.translate_text(item.original, region, on_progress)
+            recorder = self.session_recorder
+            if recorder is not None:
+                recorder.add_result(job.seq, item.original, item.translated)
+            batcher = region.segment_translator.batcher
+
+            if region.segment_translator.last_used_fallback:
+                item.status = f"⚠ 翻訳サービスに接続できないためオフライン訳を表示中 | {self._frame_stats_text()}"
+            else:
+                # 暫定のオフライン訳は保存しない
+                self.screen_memo.put(item.fingerprint, item.original, item.translated)
+                region.ocr_gate.accept(item.original, item.translated)
+                item.status = (
+                    f"✅ 翻訳完了 | 元: {len(item.original)}文字 → 訳: {len(item.translated)}文字"
+                    f" (送信 {batcher.last_sent_chars}文字/{batcher.last_requests}回) | {self._frame_stats_text()}"
+                )
+            self._queue_render(job, item)
+
+        self._map_items(translate, job.items)
+        return None
+
+    def _reuse_translation(self, job, item, reuse):
+        """OCRの揺れと判定した認識結果に前回の訳を使う"""
+        distance = item.region.ocr_gate.last_distance
+        self.tracer.count('ocr_jitter_frames' if distance else 'ocr_same_frames')
+        item.original, item.translated = reuse
+        recorder = self.session_recorder
+        if recorder is not None:
+            recorder.add_result(job.seq, item.original, item.translated)
+        self.screen_memo.put(item.fingerprint, item.original, item.translated)
+        if distance:
+            item.status = f"〰 認識結果の揺れ（{distance}文字）のため前回の翻訳を表示 | {self._frame_stats_text()}"
+        else:
+            item.status = f"✅ 認識結果が前回と同じため前回の翻訳を表示 | {self._frame_stats_text()}"
+        self._queue_render(job, item)
+
+    def _queue_render(self, job, item, progress=None):
+        """領域の描画待ちの結果を最新のものに置き換え、UIスレッドでの描画を予約
+
+        progressは翻訳途中の (訳文, ステータス)。描画は前回から render_interval 以上空けて行う。
+        文字の画像はここ（ワーカースレッド）で描画し、UIスレッドでは貼り付けるだけにする。
+        """
+        # 途中経過も同じく描画しておく（訳し終わった行と折り返しが変わった行だけ縁取りを描き直す）
+        prepared = None
+        if not self._is_stale(job.seq, item.region):
+            with self.tracer.span('rasterize', seq=job.seq):
+                prepared = self._text_view_for(item.region).prepare(
+                    item.translated if progress is None else progress[0]
+                )
+        with self._render_lock:
+            scheduled = bool(self._render_pending)
+            replaced = self._render_pending.get(item.region)
+            self._render_pending[item.region] = (job.seq, job.created, item, progress, prepared)
+        if not scheduled:
+            delay = self.render_interval - (time.perf_counter() - self._last_render) * 1000
+            self.root.after(max(0, round(delay)), self._render_pending_job)
+        if replaced is not None and replaced[3] is None:
+            # 描画前に次の結果が届いた（古い方は描画しない）
+            self.tracer.count('dropped_frames')
+
+    def _render_pending_job(self):
+        """描画待ちの結果を表示（UIスレッドで実行）"""
+        with self._render_lock:
+            pending = self._render_pending
+            self._render_pending = {}
+        self._last_render = time.perf_counter()
+        for seq, created, item, progress, prepared in pending.values():
+            region = item.region
+            if self._is_stale(seq, region):
+                continue
+            if progress is not None:
+                self._paint(region, *progress, prepared)
+            else:
+                self._show_result(seq, item.original, item.translated, item.status, region, prepared)
+            now = time.perf_counter()
+            if seq > region.first_text_seq:
+                # キャプチャ要求から最初の訳文（途中経過を含む）が表示されるまで
+                region.first_text_seq = seq
+                self.tracer.record('first_text', now - created, created, seq=seq)
+            if progress is None:
+                # キャプチャ要求から翻訳を終えた結果が表示されるまで
+                self.tracer.record('end_to_end', now - created, created, seq=seq)
+
+    def _on_job_dropped(self, stage, old, new):
+        """処理待ちのフレームが新しいフレームに置き換えられた"""
+        # 置き換えた側にない領域はそのまま引き継ぎ、手動実行の要求も引き継ぐ
+        items = {item.region: item for item in new.items}
+        for item in old.items:
+            current = items.get(item.region)
+            if current is None:
+                new.items.append(item)
+            else:
+                current.force = current.force or item.force
+        self.tracer.count('dropped_frames')
+
+    def _on_stage_error(self, stage, job, error):
+        """いずれかの段階で例外が発生した"""
+        message = str(error)
+        summary = message.splitlines()[0] if message else type(error).__name__
+        for item in job.items:
+            # 失敗したフレームは次回やり直せるように基準を破棄
+            item.region.change_detector.reset()
+            item.region.scroll_ocr.reset()
+            self._post_status(job.seq, f"❌ エラー: {summary[:60]}", item.region)
+        # エラーはステータスバーに表示する。ダイアログは手動実行でOCRの設定などに問題がある時のみ
+        # （自動翻訳や一時的な翻訳サービスのエラーでダイアログを出すと、毎回操作を妨げてしまう）
+        forced = [item for item in job.items if item.force]
+        if stage != 'translate' and forced:
+            region = forced[0].region
+            self.root.after(0, lambda: self._show_error(job.seq, message, region))
+
+    def toggle_pipeline_debug(self):
+        """ステータスバーへのキュー長の表示を切り替え"""
+        self.show_pipeline_debug = not self.show_pipeline_debug
+        self.status_label.config(text=self._frame_stats_text())
+
+    def toggle_hud(self):
+        """ステータスバーへの処理時間（p50/p95）の表示を切り替え"""
+        self.show_hud = not self.show_hud
+        if self.show_hud:
+            self.hud_label.pack(side=tk.RIGHT, padx=5, pady=2, before=self.size_label)
+            self._update_hud()
+        else:
+            if self.hud_job:
+                self.root.after_cancel(self.hud_job)
+                self.hud_job = None
+            self.hud_label.pack_forget()
+
+    def _update_hud(self):
+        """処理時間の表示を定期的に更新"""
+        if not self.show_hud:
+            return
+        cache_stats = self.translation_cache.stats()
+        memo_stats = self.screen_memo.stats()
+        self.hud_label.config(
+            text=f"{self.tracer.hud_text()} ms | キャッシュ {cache_stats['hit_rate']:.0%} | 画面 {memo_stats['hit_rate']:.0%}"
+        )
+        self.hud_job = self.root.after(500, self._update_hud)
+
+    def export_traces(self):
+        """計測結果をJSON LinesとChromeトレース形式で保存"""
+        try:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            self.tracer.export_jsonl(os.path.join(self.trace_dir, f'trace-{stamp}.jsonl'))
+            self.tracer.export_chrome_trace(os.path.join(self.trace_dir, f'trace-{stamp}.json'))
+        except OSError as e:
+            self.status_label.config(text=f"❌ トレースを保存できませんでした: {str(e)[:40]}")
+            return
+        self.status_label.config(text=f"📊 トレースを保存しました: traces/trace-{stamp}")
+
+    def toggle_recording(self):
+        """セッションの録画を開始/停止"""
+        recorder = self.session_recorder
+        if recorder is not None:
+            self.session_recorder = None
+            recorder.close()
+            size_mb = recorder.written_bytes / 1_000_000
+            self.status_label.config(
+                text=f"⏹ 録画を保存しました: {recorder.frames}フレーム {size_mb:.1f}MB ({os.path.basename(recorder.path)})"
+            )
+            return
+
+        if len(self.regions) > 1:
+            # 複数の領域を囲む範囲を撮影したフレームは、再生時にメインの領域と区別できない
+            self.status_label.config(text="❌ 翻訳領域を追加している間は録画できません（✕で閉じてください）")
+            return
+        try:
+            os.makedirs(self.session_dir, exist_ok=True)
+            path = os.path.join(self.session_dir, f"session-{time.strftime('%Y%m%d-%H%M%S')}.tos")
+            self.session_recorder = SessionRecorder(path)
+        except OSError as e:
+            self.status_label.config(text=f"❌ 録画を開始できませんでした: {str(e)[:40]}")
+            return
+        self.status_label.config(text="⏺ 録画中（F10で停止）")
+
+    def _on_replay_finished(self):
+        """セッションを最後まで再生した（UIスレッドで実行）"""
+        if self.is_auto_translate:
+            self.toggle_auto_translate()
+        self.status_label.config(text=f"⏹ 再生が終了しました | {self._frame_stats_text()}")
+
+    def _is_stale(self, seq, region=None):
+        """既に新しい結果を表示済み（またはクリア済み・領域を閉じた後）ならTrue"""
+        region = region or self.main_region
+        return seq <= region.shown_seq or region not in self.regions
+
+    def _status_label_for(self, region):
+        """領域のステータス表示"""
+        return self.status_label if region.window is None else region.window.status_label
+
+    def _post_status(self, seq, text, region=None):
+        """ワーカースレッドからステータスを更新（古いサイクルの表示は捨てる）"""
+        region = region or self.main_region
+        self.root.after(
+            0, lambda: None if self._is_stale(seq, region) else self._status_label_for(region).config(text=text)
+        )
+
+    def _show_result(self, seq, original, translated, status, region=None, prepared=None):
+        """翻訳結果を表示（UIスレッドで実行。preparedはワーカーで描画済みの画像）"""
+        region = region or self.main_region
+        if self._is_stale(seq, region):
+            return
+        region.shown_seq = seq
+        if region is self.main_region:
+            self.original_text = original
+            self.translated_text = translated
+        self._paint(region, translated, status, prepared)
+
+    def _paint(self, region, text, status, prepared=None):
+        """領域に訳文とステータスを表示（UIスレッドで実行）"""
+        if region.window is not None:
+            region.window.display_text(text, prepared)
+            region.window.status_label.config(text=status)
+        else:
+            self.display_text(text, prepared=prepared)
+            self.status_label.config(text=status)
 
-        # バックグラウンドスレッドで実行
-        thread = threading.Thread(target=do_translate, daemon=True)
-        thread.start()
+    def _text_view_for(self, region):
+        """領域の訳文を表示するCanvasTextView"""
+        return self.text_view if region.window is None else region.window.text_view
+
+    def _show_error(self, seq, message, region=None):
+        """エラーダイアログを表示（UIスレッドで実行）"""
+        if self._is_stale(seq, region):
+            return
+        messagebox.showerror("エラー", message)
+
+    def add_region(self, name, x, y, width, height, interval=None):
+        """翻訳領域を追加（x, y, width, heightはキャプチャ範囲の画面座標）
+
+        録画中は追加できない（録画には領域ごとの位置を保存しないため）。
+        """
+        if self.session_recorder is not None:
+            raise ValueError("録画中は翻訳領域を追加できません（F10で録画を停止してください）")
+        segment_translator = SegmentTranslator(
+            self.translator_backend, self.translation_cache,
+            source=self.source_lang, target=self.target_lang,
+            fallback=self.segment_translator.fallback, batcher=self.segment_translator.batcher
+        )
+        region = TranslationRegion(
+            name, segment_translator, ScrollOcr(self.ocr_engine, self.preprocessor),
+            interval=interval or self.auto_translate_interval, change_threshold=self.change_threshold,
+            jitter_threshold=self.ocr_jitter_threshold, jitter_min_length=self.ocr_jitter_min_length
+        )
+        region.window = RegionWindow(self, region, x, y, width, height)
+        self.regions.append(region)
+        if self.is_auto_translate:
+            # 新しい領域をすぐに翻訳できるように次の周期を待たずに確認する
+            self._restart_auto_translate_loop()
+        return region
+
+    def ask_add_region(self):
+        """名前を入力して、メインウィンドウの下に翻訳領域を追加"""
+        name = simpledialog.askstring(
+            "領域を追加", "領域の名前:", initialvalue=f"領域{len(self.regions)}", parent=self.root
+        )
+        if not name:
+            return
+        x = self.root.winfo_x() + RegionWindow.border
+        y = self.root.winfo_y() + self.root.winfo_height() + RegionWindow.header_height + RegionWindow.border
+        try:
+            self.add_region(name, x, y, 400, 120)
+        except ValueError as e:
+            self.status_label.config(text=f"❌ {e}")
+            return
+        self.status_label.config(text=f"＋ 領域「{name}」を追加しました（{len(self.regions)}領域）")
+
+    def remove_region(self, region):
+        """追加した翻訳領域を閉じる"""
+        if region not in self.regions or region.window is None:
+            return
+        self.regions.remove(region)
+        with self._render_lock:
+            self._render_pending.pop(region, None)
+        region.window.destroy()
+        self.status_label.config(text=f"✕ 領域「{region.name}」を閉じました（{len(self.regions)}領域）")
 
     def toggle_auto_translate(self):
         """自動翻訳のON/OFF切り替え"""
         self.is_auto_translate = not self.is_auto_translate
 
         if self.is_auto_translate:
+            self.main_region.interval = self.auto_translate_interval
+            for region in self.regions:
+                region.next_due = 0.0
             self.auto_btn.config(text="▶ 自動ON", bg='#e94560')
-            self.status_label.config(text=f"🔄 自動翻訳ON ({self.auto_translate_interval/1000}秒間隔)")
+            status = f"🔄 自動翻訳ON ({self.auto_translate_interval/1000}秒間隔)"
+            if len(self.regions) > 1:
+                status += f" | {len(self.regions)}領域"
+            self.status_label.config(text=status)
             self._auto_translate_loop()
         else:
             self.auto_btn.config(text="⏸ 自動OFF", bg='#0f3460')
@@ -646,16 +4222,40 @@ class TranslatorOverlay:
                 self.auto_job = None
 
     def _auto_translate_loop(self):
-        """自動翻訳ループ"""
-        if self.is_auto_translate:
-            self.translate_once()
-            self.auto_job = self.root.after(self.auto_translate_interval, self._auto_translate_loop)
+        """自動翻訳ループ（間隔が来た領域をまとめて1回のキャプチャで処理）"""
+        if not self.is_auto_translate:
+            return
+        now = time.perf_counter()
+        due = [region for region in self.regions if region.next_due <= now + self.region_slack]
+        if due and self.pipeline.block and not self.pipeline.can_submit():
+            # 前のフレームがキャプチャ段階に渡るまで待つ（UIスレッドをsubmitで止めない）
+            due = []
+        if due:
+            for region in due:
+                region.next_due = now + region.interval / 1000
+            self.translate_once(skip_unchanged=True, regions=due)
+        delay = min(region.next_due for region in self.regions) - now
+        self.auto_job = self.root.after(max(10, round(delay * 1000)), self._auto_translate_loop)
+
+    def _restart_auto_translate_loop(self):
+        """待機中の自動翻訳ループを取り消して、すぐに次の確認を行う"""
+        if self.auto_job:
+            self.root.after_cancel(self.auto_job)
+            self.auto_job = None
+        self._auto_translate_loop()
 
     def clear_text(self):
-        """翻訳テキストをクリア"""
-        self.text_canvas.delete("all")
+        """翻訳テキストをクリア（すべての領域）"""
+        self._clear_canvas()
         self.translated_text = ""
         self.original_text = ""
+        for region in self.regions:
+            region.reset()
+            # 処理中のフレームの結果が後から表示されないようにする
+            region.shown_seq = self.job_sequence
+            if region.window is not None:
+                region.window.clear()
+                region.window.status_label.config(text="🗑 クリアしました")
         self.status_label.config(text="🗑 クリアしました")
 
     def toggle_fullscreen(self):
@@ -691,6 +4291,17 @@ class TranslatorOverlay:
         """アプリを終了"""
         if self.auto_job:
             self.root.after_cancel(self.auto_job)
+        if self.hud_job:
+            self.root.after_cancel(self.hud_job)
+        self.pipeline.close()
+        self.region_pool.shutdown(wait=False, cancel_futures=True)
+        if self.session_recorder is not None:
+            self.session_recorder.close()
+        self.segment_translator.close()
+        self.capture_service.close()
+        self.ocr_engine.close()
+        self.parallel_ocr.close()
+        self.translation_cache.close()
         self.root.destroy()
 
     def run(self):
@@ -701,12 +4312,273 @@ class TranslatorOverlay:
         x = (screen_width - self.window_width) // 2
         y = (screen_height - self.window_height) // 2
         self.root.geometry(f"{self.window_width}x{self.window_height}+{x}+{y}")
+        self.root.after(0, self._on_window_shown)
+
+        if self.replay_path:
+            # 再生は自動翻訳で進める（'max'の場合はフレームを捨てずに、キャプチャ段階が空き次第次のフレームへ）
+            if self.capture_service.speed == 'max':
+                self.auto_translate_interval = 10
+            self.root.after(500, self.toggle_auto_translate)
 
         self.root.mainloop()
 
 
+# ============================================================
+# 一括翻訳（ウィンドウを開かずに画像フォルダや動画を処理）
+# ============================================================
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+
+
+def iter_image_frames(directory):
+    """フォルダ内の画像をファイル名順にFrameとして読み込む"""
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith(IMAGE_EXTENSIONS))
+
+    def frames():
+        for name in names:
+            with Image.open(os.path.join(directory, name)) as image:
+                yield name, Frame.from_image(image)
+    return frames(), len(names)
+
+
+def iter_video_frames(path, every=1):
+    """動画のフレームを every フレームごとにFrameとして読み込む（opencv-pythonが必要）"""
+    try:
+        import cv2
+    except ImportError:
+        raise RuntimeError("動画を読み込むには opencv-python が必要です（pip install opencv-python）")
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        capture.release()
+        raise RuntimeError(f"動画を開けません: {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+
+    def frames():
+        index = 0
+        try:
+            while True:
+                ok = capture.grab()
+                if not ok:
+                    break
+                if index % every == 0:
+                    ok, bgr = capture.retrieve()
+                    if not ok:
+                        break
+                    seconds = index / fps if fps else 0.0
+                    yield f"{index} ({seconds:.2f}s)", Frame(cv2.cvtColor(bgr, cv2.COLOR_BGR2BGRA), timestamp=seconds)
+                index += 1
+        finally:
+            capture.release()
+    return frames(), (total + every - 1) // every
+
+
+def iter_session_frames(path, every=1, speed='max'):
+    """録画したセッション（.tos）のフレームを every フレームごとに読み込む"""
+    reader = SessionReader(path)
+
+    def frames():
+        try:
+            for index, frame in enumerate(reader.frames(speed)):
+                if index % every == 0:
+                    yield f"{index} ({frame.timestamp - reader.timestamps[0]:.2f}s)", frame
+        finally:
+            reader.close()
+    return frames(), (len(reader) + every - 1) // every
+
+
+def open_frame_source(path, every=1, speed='max'):
+    """フォルダ・画像ファイル・動画・セッションから (Frameのイテレータ, 総数) を返す"""
+    if os.path.isdir(path):
+        return iter_image_frames(path)
+    if path.lower().endswith('.tos'):
+        return iter_session_frames(path, every, speed)
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        def frames():
+            with Image.open(path) as image:
+                yield os.path.basename(path), Frame.from_image(image)
+        return frames(), 1
+    return iter_video_frames(path, every)
+
+
+class BatchRunner:
+    """フレーム列をOCR・翻訳してJSON Linesで書き出す
+
+    OCRはワーカースレッド（workers > 1 ならプロセスプールの並列OCR）で
+    先読みしながら進め、翻訳は元の順序のまま1フレームずつ行う
+    （SegmentTranslatorが直前のフレームの訳を再利用できるように）。
+    直前のフレームと同じ画面はOCR・翻訳せずに前の結果を書き出す。
+    """
+
+    def __init__(self, segment_translator, ocr_engine_name='auto', workers=1, preprocessor=None,
+                 text_region_mode='auto', text_region_min_pixels=1_000_000, change_threshold=12):
+        self.segment_translator = segment_translator
+        self.workers = max(1, workers)
+        self.ocr_engine = create_ocr_engine(ocr_engine_name)
+        self.parallel_ocr = ParallelOcr(self.workers, engine_name=ocr_engine_name) if self.workers > 1 else None
+        self.preprocessor = preprocessor or Preprocessor()
+        self.text_region_mode = text_region_mode
+        self.text_region_min_pixels = text_region_min_pixels
+        self.text_region_detector = TextRegionDetector()
+        self.change_detector = ChangeDetector(threshold=change_threshold)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='batch-ocr')
+
+        # 統計
+        self.frames = 0
+        self.duplicates = 0
+        self.errors = 0
+
+    def _ocr(self, frame):
+        """1フレームをOCR（ワーカースレッドで実行）"""
+        region_detector = None
+        if self.text_region_mode == 'always' or (
+                self.text_region_mode == 'auto' and frame.width * frame.height >= self.text_region_min_pixels):
+            region_detector = self.text_region_detector
+        start = time.perf_counter()
+        text = ocr_frame(frame, self.ocr_engine.recognize, self.preprocessor, region_detector, self.parallel_ocr)
+        return text.strip(), (time.perf_counter() - start) * 1000
+
+    def run(self, frames, out, total=0, progress=None):
+        """framesの (名前, Frame) を順に処理し、1フレーム1行のJSONをoutに書き出す"""
+        pending = deque()  # (名前, OCRのFuture / 重複ならNone)
+        last = None  # 直前に書き出した結果
+        start = time.perf_counter()
+        last_report = 0.0
+
+        def finish(name, future):
+            nonlocal last
+            if future is None:
+                self.duplicates += 1
+                record = {'source': name, 'duplicate': True}
+                if last is not None:
+                    record['duplicate_of'] = last['source']
+                    record.update((key, last[key]) for key in ('original', 'translated', 'provisional', 'error')
+                                  if key in last)
+            else:
+                record = {'source': name, 'duplicate': False}
+                try:
+                    original, ocr_ms = future.result()
+                    translate_start = time.perf_counter()
+                    translated = self.segment_translator.translate(original) if original else ""
+                    record.update(
+                        original=original,
+                        translated=translated,
+                        provisional=self.segment_translator.last_used_fallback,
+                        ocr_ms=round(ocr_ms, 1),
+                        translate_ms=round((time.perf_counter() - translate_start) * 1000, 1),
+                    )
+                except (OcrUnavailableError, pytesseract.TesseractNotFoundError):
+                    raise
+                except Exception as e:
+                    self.errors += 1
+                    record['error'] = str(e)
+                last = record
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.frames += 1
+
+        try:
+            for name, frame in frames:
+                if self.change_detector.has_changed(frame):
+                    pending.append((name, self._executor.submit(self._ocr, frame)))
+                else:
+                    pending.append((name, None))
+                # 先読みはワーカー数の2倍まで（メモリを使いすぎないように）
+                while len(pending) > self.workers * 2:
+                    finish(*pending.popleft())
+
+                if progress is not None and time.perf_counter() - last_report >= 0.5:
+                    last_report = time.perf_counter()
+                    progress(self.progress_text(total, last_report - start))
+            while pending:
+                finish(*pending.popleft())
+        finally:
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+        return self.progress_text(total, time.perf_counter() - start)
+
+    def progress_text(self, total, elapsed):
+        """進捗と処理速度の表示用文字列"""
+        rate = self.frames / elapsed if elapsed else 0.0
+        cache_stats = self.segment_translator.cache.stats()
+        count = f"{self.frames}/{total}" if total else f"{self.frames}"
+        return (
+            f"処理 {count} | {rate:.1f} 枚/秒 | 重複 {self.duplicates} | エラー {self.errors}"
+            f" | キャッシュ {cache_stats['hit_rate']:.0%} | 送信 {self.segment_translator.total_sent_chars}文字"
+        )
+
+    def close(self):
+        """ワーカーとOCRエンジンを停止"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.parallel_ocr is not None:
+            self.parallel_ocr.close()
+        self.ocr_engine.close()
+
+
+def run_batch(args):
+    """--batch 指定時の一括翻訳（終了コードを返す）"""
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        frames, total = open_frame_source(args.batch, max(1, args.every), args.speed)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"読み込めません: {e}", file=sys.stderr)
+        return 1
+
+    cache = TranslationCache(db_path=os.path.join(app_dir, 'translation_cache.db'))
+    backend = create_translator_backend(
+        args.translator, args.source, args.target, dictionary_path=os.path.join(app_dir, 'offline_dictionary.tsv')
+    )
+    fallback = None
+    if backend.name != 'offline':
+        fallback = OfflineDictionaryBackend(os.path.join(app_dir, 'offline_dictionary.tsv'))
+    segment_translator = SegmentTranslator(backend, cache, source=args.source, target=args.target, fallback=fallback)
+    runner = BatchRunner(segment_translator, ocr_engine_name=args.engine, workers=args.workers)
+
+    def progress(text):
+        print(f"\r{text}\033[K", end='', file=sys.stderr, flush=True)
+
+    try:
+        with open(args.out, 'w', encoding='utf-8') as out:
+            summary = runner.run(frames, out, total, progress)
+        print(f"\r{summary}\033[K", file=sys.stderr)
+        print(f"結果を保存しました: {args.out}", file=sys.stderr)
+        return 0
+    except (OcrUnavailableError, pytesseract.TesseractNotFoundError):
+        print("\nTesseract OCRが見つかりません。SETUP_GUIDE.md を参照してインストールしてください。", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print(f"\n中断しました: {runner.progress_text(total, 0)}", file=sys.stderr)
+        return 130
+    finally:
+        runner.close()
+        segment_translator.close()
+        cache.close()
+
+
 def main():
     """メイン関数"""
+    parser = argparse.ArgumentParser(description="リアルタイム翻訳オーバーレイ")
+    parser.add_argument('--batch', metavar='PATH',
+                        help="画像フォルダ・画像・動画・録画したセッションを一括翻訳（ウィンドウは開かない）")
+    parser.add_argument('--replay', metavar='FILE', help="録画したセッション（.tos）を画面の代わりに再生")
+    parser.add_argument('--speed', default=None, choices=['recorded', 'max'],
+                        help="セッションの再生速度（既定: --replay は recorded、--batch は max）")
+    parser.add_argument('--out', default='results.jsonl', help="一括翻訳の結果（JSON Lines）")
+    parser.add_argument('--workers', type=int, default=min(8, os.cpu_count() or 1), help="OCRの並列数")
+    parser.add_argument('--every', type=int, default=1, help="動画・セッションは every フレームごとに処理")
+    parser.add_argument('--engine', default='auto', help="OCRエンジン（auto/tesserocr/pytesseract）")
+    parser.add_argument('--translator', default='google', choices=['google', 'offline'], help="翻訳バックエンド")
+    parser.add_argument('--source', default='en', help="翻訳元の言語")
+    parser.add_argument('--target', default='ja', help="翻訳先の言語")
+    parser.add_argument('--startup-log', metavar='FILE', help="起動時間をJSON Linesで追記するファイル")
+    parser.add_argument('--region', metavar='NAME=WxH+X+Y[@MS]', type=parse_region_spec, action='append',
+                        help="翻訳領域を追加（画面座標のキャプチャ範囲と自動翻訳の間隔。複数指定可）")
+    args = parser.parse_args()
+    if args.batch:
+        args.speed = args.speed or 'max'
+        sys.exit(run_batch(args))
+
     try:
         print("=" * 50)
         print("Real-time Translation Overlay")
@@ -717,13 +4589,17 @@ def main():
         print("  - Drag bottom-right corner: Resize")
         print("  - F5: Translate")
         print("  - F6: Auto translate ON/OFF")
+        print("  - +: Add a translation region")
         print("  - ESC: Exit")
         print("-" * 50)
     except UnicodeEncodeError:
         pass  # コンソール出力エラーを無視
 
     try:
-        app = TranslatorOverlay()
+        app = TranslatorOverlay(
+            replay_path=args.replay, replay_speed=args.speed or 'recorded', startup_log=args.startup_log,
+            regions=args.region
+        )
         app.run()
     except Exception as e:
         print(f"\nエラーが発生しました: {e}")